@@ -2,8 +2,9 @@ import abc
 import argparse
 import copy
 from collections import ChainMap
-from ctypes import c_int32, c_uint32
-from functools import partial
+from ctypes import c_int32
+from functools import lru_cache
+from itertools import accumulate
 import logging
 import os
 import re
@@ -78,17 +79,19 @@ def log_conversion(pass_name, item_a, item_b):
 
 
 def lookup_register(reg, compressed=False):
-    # reg might be a hex / octal value
-    try:
-        reg = int(reg, base=0)
-    except:
-        pass
+    # common case: reg is already an int, name, or alias
+    value = REGISTERS.get(reg)
 
-    # at this point, any valid reg will be in the REGISTERS dict
-    try:
-        reg = REGISTERS[reg]
-    except KeyError:
+    # otherwise, reg might be a hex / octal value
+    if value is None:
+        try:
+            value = REGISTERS.get(int(reg, base=0))
+        except (TypeError, ValueError):
+            pass
+
+    if value is None:
         raise ValueError('register must be a valid integer, name, or alias: {}'.format(reg))
+    reg = value
 
     # check for compressed instruction register, validate and apply
     if compressed:
@@ -115,9 +118,9 @@ def sign_extend(value, bits):
 
 
 def relocate_hi(imm):
-    if imm & 0x800:
-        imm += 2**12
-    return sign_extend((imm >> 12) & 0x000fffff, 20)
+    # adding 0x800 carries into the upper 20 bits exactly when
+    # the lower 12 bits will be sign extended as a negative value
+    return sign_extend(((imm + 0x800) >> 12) & 0x000fffff, 20)
 
 
 def relocate_lo(imm):
@@ -148,672 +151,660 @@ ImmNotZero = constraint_not('imm', 0)
 ShamtBit5Zero = constraint_bit('imm', 5, 0)
 
 
-def r_type(rd, rs1, rs2, *, opcode, funct3, funct7):
-    rd = lookup_register(rd)
-    rs1 = lookup_register(rs1)
-    rs2 = lookup_register(rs2)
+# each *_type func binds an instruction's fixed fields once
+# and returns an encoder that only takes the per-use operands
+def r_type(*, opcode, funct3, funct7):
+    base = opcode | funct3 << 12 | funct7 << 25
 
-    code = 0
-    code |= opcode
-    code |= rd << 7
-    code |= funct3 << 12
-    code |= rs1 << 15
-    code |= rs2 << 20
-    code |= funct7 << 25
+    def encode(rd, rs1, rs2):
+        rd = lookup_register(rd)
+        rs1 = lookup_register(rs1)
+        rs2 = lookup_register(rs2)
 
-    return code
+        return base | rd << 7 | rs1 << 15 | rs2 << 20
+    return encode
 
 
-def i_type(rd, rs1, imm, *, opcode, funct3):
-    rd = lookup_register(rd)
-    rs1 = lookup_register(rs1)
+def i_type(*, opcode, funct3):
+    base = opcode | funct3 << 12
 
-    if imm < -0x800 or imm > 0x7ff:
-        raise ValueError('12-bit immediate must be between -0x800 (-2048) and 0x7ff (2047): {}'.format(imm))
+    def encode(rd, rs1, imm):
+        rd = lookup_register(rd)
+        rs1 = lookup_register(rs1)
 
-    imm = c_uint32(imm).value & 0b111111111111
+        # biasing by the lower bound leaves high bits set only when out of range
+        if (imm + 0x800) >> 12:
+            raise ValueError('12-bit immediate must be between -0x800 (-2048) and 0x7ff (2047): {}'.format(imm))
 
-    code = 0
-    code |= opcode
-    code |= rd << 7
-    code |= funct3 << 12
-    code |= rs1 << 15
-    code |= imm << 20
+        imm = imm & 0b111111111111
 
-    return code
+        return base | rd << 7 | rs1 << 15 | imm << 20
+    return encode
 
 
 # i-type variation for JALR
-def ij_type(rd, rs1, imm, *, opcode, funct3):
-    rd = lookup_register(rd)
-    rs1 = lookup_register(rs1)
+def ij_type(*, opcode, funct3):
+    base = opcode | funct3 << 12
 
-    if imm < -0x800 or imm > 0x7ff:
-        raise ValueError('12-bit immediate must be between -0x800 (-2048) and 0x7ff (2047): {}'.format(imm))
-    if imm % 2 != 0:
-        raise ValueError('12-bit immediate must be a multiple of 2: {}'.format(imm))
+    def encode(rd, rs1, imm):
+        rd = lookup_register(rd)
+        rs1 = lookup_register(rs1)
 
-    imm = c_uint32(imm).value & 0b111111111111
+        if (imm + 0x800) >> 12:
+            raise ValueError('12-bit immediate must be between -0x800 (-2048) and 0x7ff (2047): {}'.format(imm))
+        if imm % 2 != 0:
+            raise ValueError('12-bit immediate must be a multiple of 2: {}'.format(imm))
 
-    code = 0
-    code |= opcode
-    code |= rd << 7
-    code |= funct3 << 12
-    code |= rs1 << 15
-    code |= imm << 20
+        imm = imm & 0b111111111111
 
-    return code
+        return base | rd << 7 | rs1 << 15 | imm << 20
+    return encode
 
 
-def s_type(rs1, rs2, imm, *, opcode, funct3):
-    rs1 = lookup_register(rs1)
-    rs2 = lookup_register(rs2)
+# i-type variation for ECALL, EBREAK, FENCE.I
+def ie_type(*, opcode, funct3, imm):
+    # no operands, so the whole instruction is known up front
+    code = i_type(opcode=opcode, funct3=funct3)(0, 0, imm)
 
-    if imm < -0x800 or imm > 0x7ff:
-        raise ValueError('12-bit immediate must be between -0x800 (-2048) and 0x7ff (2047): {}'.format(imm))
+    def encode():
+        return code
+    return encode
 
-    imm = c_uint32(imm).value & 0b111111111111
 
-    imm_11_5 = (imm >> 5) & 0b1111111
-    imm_4_0 = imm & 0b11111
+def s_type(*, opcode, funct3):
+    base = opcode | funct3 << 12
 
-    code = 0
-    code |= opcode
-    code |= imm_4_0 << 7
-    code |= funct3 << 12
-    code |= rs1 << 15
-    code |= rs2 << 20
-    code |= imm_11_5 << 25
+    def encode(rs1, rs2, imm):
+        rs1 = lookup_register(rs1)
+        rs2 = lookup_register(rs2)
 
-    return code
+        if (imm + 0x800) >> 12:
+            raise ValueError('12-bit immediate must be between -0x800 (-2048) and 0x7ff (2047): {}'.format(imm))
 
+        imm = imm & 0b111111111111
 
-def b_type(rs1, rs2, imm, *, opcode, funct3):
-    rs1 = lookup_register(rs1)
-    rs2 = lookup_register(rs2)
+        imm_11_5 = (imm >> 5) & 0b1111111
+        imm_4_0 = imm & 0b11111
 
-    if imm < -0x1000 or imm > 0x0fff:
-        raise ValueError('12-bit MO2 immediate must be between -0x1000 (-4096) and 0x0fff (4095): {}'.format(imm))
-    if imm % 2 != 0:
-        raise ValueError('12-bit MO2 immediate must be a muliple of 2: {}'.format(imm))
+        return base | imm_4_0 << 7 | rs1 << 15 | rs2 << 20 | imm_11_5 << 25
+    return encode
 
-    imm = imm >> 1
-    imm = c_uint32(imm).value & 0b111111111111
 
-    imm_12 = (imm >> 11) & 0b1
-    imm_11 = (imm >> 10) & 0b1
-    imm_10_5 = (imm >> 4) & 0b111111
-    imm_4_1 = imm & 0b1111
+def b_type(*, opcode, funct3):
+    base = opcode | funct3 << 12
 
-    code = 0
-    code |= opcode
-    code |= imm_11 << 7
-    code |= imm_4_1 << 8
-    code |= funct3 << 12
-    code |= rs1 << 15
-    code |= rs2 << 20
-    code |= imm_10_5 << 25
-    code |= imm_12 << 31
+    def encode(rs1, rs2, imm):
+        rs1 = lookup_register(rs1)
+        rs2 = lookup_register(rs2)
 
-    return code
+        if (imm + 0x1000) >> 13:
+            raise ValueError('12-bit MO2 immediate must be between -0x1000 (-4096) and 0x0fff (4095): {}'.format(imm))
+        if imm % 2 != 0:
+            raise ValueError('12-bit MO2 immediate must be a muliple of 2: {}'.format(imm))
 
+        imm = imm >> 1
+        imm = imm & 0b111111111111
 
-def u_type(rd, imm, *, opcode):
-    rd = lookup_register(rd)
+        imm_12 = (imm >> 11) & 0b1
+        imm_11 = (imm >> 10) & 0b1
+        imm_10_5 = (imm >> 4) & 0b111111
+        imm_4_1 = imm & 0b1111
 
-    # be flexible with the "upper" range here (wraps to negative)
-    if imm >= 0x80000 and imm <= 0xfffff:
-        imm = imm - 2**20
-    if imm < -0x80000 or imm > 0x7ffff:
-        raise ValueError('20-bit immediate must be between -0x80000 (-524288) and 0x7ffff (524287): {}'.format(imm))
+        return (
+            base | imm_11 << 7 | imm_4_1 << 8 |
+            rs1 << 15 | rs2 << 20 | imm_10_5 << 25 | imm_12 << 31
+        )
+    return encode
 
-    imm = c_uint32(imm).value & 0b11111111111111111111
 
-    code = 0
-    code |= opcode
-    code |= rd << 7
-    code |= imm << 12
+def u_type(*, opcode):
+    def encode(rd, imm):
+        rd = lookup_register(rd)
 
-    return code
+        # be flexible with the "upper" range here (wraps to negative)
+        if imm >= 0x80000 and imm <= 0xfffff:
+            imm = imm - 2**20
+        if (imm + 0x80000) >> 20:
+            raise ValueError('20-bit immediate must be between -0x80000 (-524288) and 0x7ffff (524287): {}'.format(imm))
 
+        imm = imm & 0b11111111111111111111
 
-def j_type(rd, imm, *, opcode):
-    rd = lookup_register(rd)
+        return opcode | rd << 7 | imm << 12
+    return encode
 
-    if imm < -0x100000 or imm > 0x0fffff:
-        raise ValueError('20-bit MO2 immediate must be between -0x100000 (-1048576) and 0x0fffff (1048575): {}'.format(imm))
-    if imm % 2 != 0:
-        raise ValueError('20-bit MO2 immediate must be a muliple of 2: {}'.format(imm))
 
-    imm = imm >> 1
-    imm = c_uint32(imm).value & 0b11111111111111111111
+def j_type(*, opcode):
+    def encode(rd, imm):
+        rd = lookup_register(rd)
 
-    imm_20 = (imm >> 19) & 0b1
-    imm_19_12 = (imm >> 11) & 0b11111111
-    imm_11 = (imm >> 10) & 0b1
-    imm_10_1 = imm & 0b1111111111
+        if (imm + 0x100000) >> 21:
+            raise ValueError('20-bit MO2 immediate must be between -0x100000 (-1048576) and 0x0fffff (1048575): {}'.format(imm))
+        if imm % 2 != 0:
+            raise ValueError('20-bit MO2 immediate must be a muliple of 2: {}'.format(imm))
 
-    code = 0
-    code |= opcode
-    code |= rd << 7
-    code |= imm_19_12 << 12
-    code |= imm_11 << 20
-    code |= imm_10_1 << 21
-    code |= imm_20 << 31
+        imm = imm >> 1
+        imm = imm & 0b11111111111111111111
 
-    return code
+        imm_20 = (imm >> 19) & 0b1
+        imm_19_12 = (imm >> 11) & 0b11111111
+        imm_11 = (imm >> 10) & 0b1
+        imm_10_1 = imm & 0b1111111111
 
+        return opcode | rd << 7 | imm_19_12 << 12 | imm_11 << 20 | imm_10_1 << 21 | imm_20 << 31
+    return encode
 
-def fence(succ, pred, *, opcode, funct3, rd, rs1, fm):
-    succ = succ if type(succ) == int else int(succ, base=0)
-    pred = pred if type(pred) == int else int(pred, base=0)
-    if succ < 0b0000 or succ > 0b1111:
-        raise ValueError('invalid successor value for FENCE instruction: {}'.format(succ))
-    if pred < 0b0000 or pred > 0b1111:
-        raise ValueError('invalid predecessor value for FENCE instruction: {}'.format(pred))
 
-    imm = (fm << 8) | (pred << 4) | succ
-    return i_type(rd, rs1, imm, opcode=opcode, funct3=funct3)
+def fence(*, opcode, funct3, rd, rs1, fm):
+    encode_i = i_type(opcode=opcode, funct3=funct3)
+
+    def encode(succ, pred):
+        succ = succ if type(succ) == int else int(succ, base=0)
+        pred = pred if type(pred) == int else int(pred, base=0)
+        if succ < 0b0000 or succ > 0b1111:
+            raise ValueError('invalid successor value for FENCE instruction: {}'.format(succ))
+        if pred < 0b0000 or pred > 0b1111:
+            raise ValueError('invalid predecessor value for FENCE instruction: {}'.format(pred))
+
+        imm = (fm << 8) | (pred << 4) | succ
+        return encode_i(rd, rs1, imm)
+    return encode
+
+
+def a_type(*, opcode, funct3, funct5):
+    # build aq/rl into a funct7 for each combination and defer to r_type
+    encoders = {
+        (aq, rl): r_type(opcode=opcode, funct3=funct3, funct7=funct5 << 2 | aq << 1 | rl)
+        for aq in [0, 1]
+        for rl in [0, 1]
+    }
 
+    def encode(rd, rs1, rs2, aq=0, rl=0):
+        aq = aq if type(aq) == int else int(aq, base=0)
+        rl = rl if type(rl) == int else int(rl, base=0)
+        if aq not in [0, 1]:
+            raise ValueError('aq must be either 0 or 1')
+        if rl not in [0, 1]:
+            raise ValueError('rl must be either 0 or 1')
 
-def a_type(rd, rs1, rs2, *, opcode, funct3, funct5, aq=0, rl=0):
-    aq = aq if type(aq) == int else int(aq, base=0)
-    rl = rl if type(rl) == int else int(rl, base=0)
-    if aq not in [0, 1]:
-        raise ValueError('aq must be either 0 or 1')
-    if rl not in [0, 1]:
-        raise ValueError('rl must be either 0 or 1')
+        return encoders[aq, rl](rd, rs1, rs2)
+    return encode
 
-    # build aq/rl into a funct7 and defer to r_type
-    funct7 = funct5 << 2 | aq << 1 | rl
-    return r_type(rd, rs1, rs2, opcode=opcode, funct3=funct3, funct7=funct7)
+
+# a-type variation for LR.W
+def al_type(*, opcode, funct3, funct5):
+    encode_a = a_type(opcode=opcode, funct3=funct3, funct5=funct5)
+
+    def encode(rd, rs1, aq=0, rl=0):
+        return encode_a(rd, rs1, 0, aq=aq, rl=rl)
+    return encode
 
 
 # c.jr, c.mv, c.ebreak, c.jalr, c.add
-def cr_type(rd_rs1, rs2, *, opcode, funct4, cs=None):
-    rd_rs1 = lookup_register(rd_rs1)
-    rs2 = lookup_register(rs2)
+def cr_type(*, opcode, funct4, cs=None):
+    base = opcode | funct4 << 12
+
+    def encode(rd_rs1, rs2):
+        rd_rs1 = lookup_register(rd_rs1)
+        rs2 = lookup_register(rs2)
+
+        # validate constraints
+        for c in cs or []:
+            c(rd_rs1=rd_rs1, rs2=rs2)
+
+        return base | rs2 << 2 | rd_rs1 << 7
+    return encode
 
-    # validate constraints
-    for c in cs or []:
-        c(rd_rs1=rd_rs1, rs2=rs2)
 
-    code = 0
-    code |= opcode
-    code |= rs2 << 2
-    code |= rd_rs1 << 7
-    code |= funct4 << 12
+# CR variation
+# c.jr, c.jalr
+def crj_type(*, opcode, funct4, cs=None):
+    encode_cr = cr_type(opcode=opcode, funct4=funct4, cs=cs)
 
-    return code
+    def encode(rd_rs1):
+        return encode_cr(rd_rs1, 0)
+    return encode
+
+
+# CR variation
+# c.ebreak
+def cre_type(*, opcode, funct4):
+    # no operands, so the whole instruction is known up front
+    code = cr_type(opcode=opcode, funct4=funct4)(0, 0)
+
+    def encode():
+        return code
+    return encode
 
 
 # c.nop, c.addi, c.li, c.slli
-def ci_type(rd_rs1, imm, *, opcode, funct3, cs=None):
-    rd_rs1 = lookup_register(rd_rs1)
+def ci_type(*, opcode, funct3, cs=None):
+    base = opcode | funct3 << 13
 
-    if imm < -32 or imm > 31:
-        raise ValueError('6-bit immediate must be between -0x20 (-32) and 0x1f (31): {}'.format(imm))
+    def encode(rd_rs1, imm):
+        rd_rs1 = lookup_register(rd_rs1)
 
-    # validate constraints
-    for c in cs or []:
-        c(rd_rs1=rd_rs1, imm=imm)
+        if imm < -32 or imm > 31:
+            raise ValueError('6-bit immediate must be between -0x20 (-32) and 0x1f (31): {}'.format(imm))
 
-    imm = c_uint32(imm).value & 0b111111
+        # validate constraints
+        for c in cs or []:
+            c(rd_rs1=rd_rs1, imm=imm)
 
-    imm_5 = (imm >> 5) & 0b1
-    imm_4_0 = imm & 0b11111
+        imm = imm & 0b111111
 
-    code = 0
-    code |= opcode
-    code |= imm_4_0 << 2
-    code |= rd_rs1 << 7
-    code |= imm_5 << 12
-    code |= funct3 << 13
+        imm_5 = (imm >> 5) & 0b1
+        imm_4_0 = imm & 0b11111
 
-    return code
+        return base | imm_4_0 << 2 | rd_rs1 << 7 | imm_5 << 12
+    return encode
+
+
+# CI variation
+# c.nop
+def cin_type(*, opcode, funct3):
+    # no operands, so the whole instruction is known up front
+    code = ci_type(opcode=opcode, funct3=funct3)(0, 0)
+
+    def encode():
+        return code
+    return encode
 
 
 # CI variation
 # c.addi16sp
-def cia_type(imm, *, opcode, funct3, cs=None):
-    if imm < -512 or imm > 511:
-        raise ValueError('6-bit MO16 immediate must be between -0x200 (-512) and 0x1ff (511): {}'.format(imm))
-    if imm % 16 != 0:
-        raise ValueError('6-bit MO16 immediate must be a multiple of 16: {}'.format(imm))
-
-    # validate constraints
-    for c in cs or []:
-        c(imm=imm)
-
-    imm = imm >> 4
-    imm = c_uint32(imm).value & 0b111111
-
-    imm_9 = (imm >> 5) & 0b1
-    imm_8_7 = (imm >> 3) & 0b11
-    imm_6 = (imm >> 2) & 0b1
-    imm_5 = (imm >> 1) & 0b1
-    imm_4 = imm & 0b1
-
-    code = 0
-    code |= opcode
-    code |= imm_5 << 2
-    code |= imm_8_7 << 3
-    code |= imm_6 << 5
-    code |= imm_4 << 6
-    code |= 0b00010 << 7
-    code |= imm_9 << 12
-    code |= funct3 << 13
-
-    return code
+def cia_type(*, opcode, funct3, cs=None):
+    base = opcode | 0b00010 << 7 | funct3 << 13
+
+    def encode(imm):
+        if imm < -512 or imm > 511:
+            raise ValueError('6-bit MO16 immediate must be between -0x200 (-512) and 0x1ff (511): {}'.format(imm))
+        if imm % 16 != 0:
+            raise ValueError('6-bit MO16 immediate must be a multiple of 16: {}'.format(imm))
+
+        # validate constraints
+        for c in cs or []:
+            c(imm=imm)
+
+        imm = imm >> 4
+        imm = imm & 0b111111
+
+        imm_9 = (imm >> 5) & 0b1
+        imm_8_7 = (imm >> 3) & 0b11
+        imm_6 = (imm >> 2) & 0b1
+        imm_5 = (imm >> 1) & 0b1
+        imm_4 = imm & 0b1
+
+        return base | imm_5 << 2 | imm_8_7 << 3 | imm_6 << 5 | imm_4 << 6 | imm_9 << 12
+    return encode
 
 
 # CI variation
 # c.lui
-def ciu_type(rd_rs1, imm, *, opcode, funct3, cs=None):
-    rd_rs1 = lookup_register(rd_rs1)
+def ciu_type(*, opcode, funct3, cs=None):
+    base = opcode | funct3 << 13
 
-    # be flexible with the "upper" range here (wraps to negative)
-    # https://stackoverflow.com/questions/63881445/what-are-the-operands-of-c-lui-instructioncompressed-subset-of-risc-v
-    if imm >= 0xfffe0 and imm <= 0xfffff:
-        imm = imm - 2**20
-    if imm < -32 or imm > 31:
-        raise ValueError('6-bit immediate must be between -0x20 (-32) and 0x1f (31): {}'.format(imm))
+    def encode(rd_rs1, imm):
+        rd_rs1 = lookup_register(rd_rs1)
 
-    # validate constraints
-    for c in cs or []:
-        c(rd_rs1=rd_rs1, imm=imm)
+        # be flexible with the "upper" range here (wraps to negative)
+        # https://stackoverflow.com/questions/63881445/what-are-the-operands-of-c-lui-instructioncompressed-subset-of-risc-v
+        if imm >= 0xfffe0 and imm <= 0xfffff:
+            imm = imm - 2**20
+        if imm < -32 or imm > 31:
+            raise ValueError('6-bit immediate must be between -0x20 (-32) and 0x1f (31): {}'.format(imm))
 
-    imm = c_uint32(imm).value & 0b111111
+        # validate constraints
+        for c in cs or []:
+            c(rd_rs1=rd_rs1, imm=imm)
 
-    imm_5 = (imm >> 5) & 0b1
-    imm_4_0 = imm & 0b11111
+        imm = imm & 0b111111
 
-    code = 0
-    code |= opcode
-    code |= imm_4_0 << 2
-    code |= rd_rs1 << 7
-    code |= imm_5 << 12
-    code |= funct3 << 13
+        imm_5 = (imm >> 5) & 0b1
+        imm_4_0 = imm & 0b11111
 
-    return code
+        return base | imm_4_0 << 2 | rd_rs1 << 7 | imm_5 << 12
+    return encode
 
 
 # CI variation
 # c.lwsp
-def cil_type(rd_rs1, imm, *, opcode, funct3, cs=None):
-    rd_rs1 = lookup_register(rd_rs1)
+def cil_type(*, opcode, funct3, cs=None):
+    base = opcode | funct3 << 13
 
-    if imm < 0 or imm > 255:
-        raise ValueError('6-bit MO4 unsigned immediate must be between 0x00 (0) and 0xff (255): {}'.format(imm))
-    if imm % 4 != 0:
-        raise ValueError('6-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
+    def encode(rd_rs1, imm):
+        rd_rs1 = lookup_register(rd_rs1)
 
-    # validate constraints
-    for c in cs or []:
-        c(rd_rs1=rd_rs1, imm=imm)
+        if imm < 0 or imm > 255:
+            raise ValueError('6-bit MO4 unsigned immediate must be between 0x00 (0) and 0xff (255): {}'.format(imm))
+        if imm % 4 != 0:
+            raise ValueError('6-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
 
-    imm = imm >> 2
-    imm = c_uint32(imm).value & 0b111111
+        # validate constraints
+        for c in cs or []:
+            c(rd_rs1=rd_rs1, imm=imm)
 
-    imm_7_6 = (imm >> 4) & 0b11
-    imm_5 = (imm >> 3) & 0b1
-    imm_4_2 = imm & 0b111
+        imm = imm >> 2
+        imm = imm & 0b111111
 
-    code = 0
-    code |= opcode
-    code |= imm_7_6 << 2
-    code |= imm_4_2 << 4
-    code |= rd_rs1 << 7
-    code |= imm_5 << 12
-    code |= funct3 << 13
+        imm_7_6 = (imm >> 4) & 0b11
+        imm_5 = (imm >> 3) & 0b1
+        imm_4_2 = imm & 0b111
 
-    return code
+        return base | imm_7_6 << 2 | imm_4_2 << 4 | rd_rs1 << 7 | imm_5 << 12
+    return encode
 
 
 # c.swsp
-def css_type(rs2, imm, *, opcode, funct3, cs=None):
-    rs2 = lookup_register(rs2)
+def css_type(*, opcode, funct3, cs=None):
+    base = opcode | funct3 << 13
 
-    if imm < 0 or imm > 255:
-        raise ValueError('6-bit MO4 unsigned immediate must be between 0x00 (0) and 0xff (255): {}'.format(imm))
-    if imm % 4 != 0:
-        raise ValueError('6-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
+    def encode(rs2, imm):
+        rs2 = lookup_register(rs2)
 
-    # validate constraints
-    for c in cs or []:
-        c(rs2=rs2, imm=imm)
+        if imm < 0 or imm > 255:
+            raise ValueError('6-bit MO4 unsigned immediate must be between 0x00 (0) and 0xff (255): {}'.format(imm))
+        if imm % 4 != 0:
+            raise ValueError('6-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
 
-    imm = imm >> 2
-    imm = c_uint32(imm).value & 0b111111
+        # validate constraints
+        for c in cs or []:
+            c(rs2=rs2, imm=imm)
 
-    imm_7_6 = (imm >> 4) & 0b11
-    imm_5_2 = imm & 0b1111
+        imm = imm >> 2
+        imm = imm & 0b111111
 
-    code = 0
-    code |= opcode
-    code |= rs2 << 2
-    code |= imm_7_6 << 7
-    code |= imm_5_2 << 9
-    code |= funct3 << 13
+        imm_7_6 = (imm >> 4) & 0b11
+        imm_5_2 = imm & 0b1111
 
-    return code
+        return base | rs2 << 2 | imm_7_6 << 7 | imm_5_2 << 9
+    return encode
 
 
 # c.addi4spn
-def ciw_type(rd, imm, *, opcode, funct3, cs=None):
-    rd = lookup_register(rd, compressed=True)
+def ciw_type(*, opcode, funct3, cs=None):
+    base = opcode | funct3 << 13
 
-    if imm < 0 or imm > 1023:
-       raise ValueError('8-bit MO4 unsigned immediate must be between 0x00 (0) and 0x3ff (1023): {}'.format(imm))
-    if imm % 4 != 0:
-        raise ValueError('8-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
+    def encode(rd, imm):
+        rd = lookup_register(rd, compressed=True)
 
-    # validate constraints
-    for c in cs or []:
-        c(rd=rd, imm=imm)
+        if imm < 0 or imm > 1023:
+           raise ValueError('8-bit MO4 unsigned immediate must be between 0x00 (0) and 0x3ff (1023): {}'.format(imm))
+        if imm % 4 != 0:
+            raise ValueError('8-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
 
-    imm = imm >> 2
-    imm = c_uint32(imm).value & 0b11111111
+        # validate constraints
+        for c in cs or []:
+            c(rd=rd, imm=imm)
 
-    imm_9_6 = (imm >> 4) & 0b1111
-    imm_5_4 = (imm >> 2) & 0b11
-    imm_3 = (imm >> 1) & 0b1
-    imm_2 = imm & 0b1
+        imm = imm >> 2
+        imm = imm & 0b11111111
 
-    code = 0
-    code |= opcode
-    code |= rd << 2
-    code |= imm_3 << 5
-    code |= imm_2 << 6
-    code |= imm_9_6 << 7
-    code |= imm_5_4 << 11
-    code |= funct3 << 13
+        imm_9_6 = (imm >> 4) & 0b1111
+        imm_5_4 = (imm >> 2) & 0b11
+        imm_3 = (imm >> 1) & 0b1
+        imm_2 = imm & 0b1
 
-    return code
+        return base | rd << 2 | imm_3 << 5 | imm_2 << 6 | imm_9_6 << 7 | imm_5_4 << 11
+    return encode
 
 
 # c.lw
-def cl_type(rd, rs1, imm, *, opcode, funct3, cs=None):
-    rd = lookup_register(rd, compressed=True)
-    rs1 = lookup_register(rs1, compressed=True)
+def cl_type(*, opcode, funct3, cs=None):
+    base = opcode | funct3 << 13
 
-    if imm < 0 or imm > 127:
-        raise ValueError('5-bit MO4 unsigned immediate must be between 0x00 (0) and 0x7f (127): {}'.format(imm))
-    if imm % 4 != 0:
-        raise ValueError('5-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
+    def encode(rd, rs1, imm):
+        rd = lookup_register(rd, compressed=True)
+        rs1 = lookup_register(rs1, compressed=True)
 
-    # validate constraints
-    for c in cs or []:
-        c(rd=rd, rs1=rs1, imm=imm)
+        if imm < 0 or imm > 127:
+            raise ValueError('5-bit MO4 unsigned immediate must be between 0x00 (0) and 0x7f (127): {}'.format(imm))
+        if imm % 4 != 0:
+            raise ValueError('5-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
 
-    imm = imm >> 2
-    imm = c_uint32(imm).value & 0b11111
+        # validate constraints
+        for c in cs or []:
+            c(rd=rd, rs1=rs1, imm=imm)
 
-    imm_6 = (imm >> 4) & 0b1
-    imm_5_3 = (imm >> 1) & 0b111
-    imm_2 = imm & 0b1
+        imm = imm >> 2
+        imm = imm & 0b11111
 
-    code = 0
-    code |= opcode
-    code |= rd << 2
-    code |= imm_6 << 5
-    code |= imm_2 << 6
-    code |= rs1 << 7
-    code |= imm_5_3 << 10
-    code |= funct3 << 13
+        imm_6 = (imm >> 4) & 0b1
+        imm_5_3 = (imm >> 1) & 0b111
+        imm_2 = imm & 0b1
 
-    return code
+        return base | rd << 2 | imm_6 << 5 | imm_2 << 6 | rs1 << 7 | imm_5_3 << 10
+    return encode
 
 
 # c.sw
-def cs_type(rs1, rs2, imm, *, opcode, funct3, cs=None):
-    rs1 = lookup_register(rs1, compressed=True)
-    rs2 = lookup_register(rs2, compressed=True)
+def cs_type(*, opcode, funct3, cs=None):
+    base = opcode | funct3 << 13
 
-    if imm < 0 or imm > 127:
-        raise ValueError('5-bit MO4 unsigned immediate must be between 0x00 (0) and 0x7f (127): {}'.format(imm))
-    if imm % 4 != 0:
-        raise ValueError('5-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
+    def encode(rs1, rs2, imm):
+        rs1 = lookup_register(rs1, compressed=True)
+        rs2 = lookup_register(rs2, compressed=True)
 
-    # validate constraints
-    for c in cs or []:
-        c(rs1=rs1, rs2=rs2, imm=imm)
+        if imm < 0 or imm > 127:
+            raise ValueError('5-bit MO4 unsigned immediate must be between 0x00 (0) and 0x7f (127): {}'.format(imm))
+        if imm % 4 != 0:
+            raise ValueError('5-bit MO4 unsigned immediate must be a multiple of 4: {}'.format(imm))
 
-    imm = imm >> 2
-    imm = c_uint32(imm).value & 0b11111
+        # validate constraints
+        for c in cs or []:
+            c(rs1=rs1, rs2=rs2, imm=imm)
 
-    imm_6 = (imm >> 4) & 0b1
-    imm_5_3 = (imm >> 1) & 0b111
-    imm_2 = imm & 0b1
+        imm = imm >> 2
+        imm = imm & 0b11111
 
-    code = 0
-    code |= opcode
-    code |= rs2 << 2
-    code |= imm_6 << 5
-    code |= imm_2 << 6
-    code |= rs1 << 7
-    code |= imm_5_3 << 10
-    code |= funct3 << 13
+        imm_6 = (imm >> 4) & 0b1
+        imm_5_3 = (imm >> 1) & 0b111
+        imm_2 = imm & 0b1
 
-    return code
+        return base | rs2 << 2 | imm_6 << 5 | imm_2 << 6 | rs1 << 7 | imm_5_3 << 10
+    return encode
 
 
 # c.sub, c.xor, c.or, c.and
-def ca_type(rd_rs1, rs2, *, opcode, funct2, funct6, cs=None):
-    rd_rs1 = lookup_register(rd_rs1, compressed=True)
-    rs2 = lookup_register(rs2, compressed=True)
+def ca_type(*, opcode, funct2, funct6, cs=None):
+    base = opcode | funct2 << 5 | funct6 << 10
 
-    # validate constraints
-    for c in cs or []:
-        c(rd_rs1=rd_rs1, rs2=rs2)
+    def encode(rd_rs1, rs2):
+        rd_rs1 = lookup_register(rd_rs1, compressed=True)
+        rs2 = lookup_register(rs2, compressed=True)
 
-    code = 0
-    code |= opcode
-    code |= rs2 << 2
-    code |= funct2 << 5
-    code |= rd_rs1 << 7
-    code |= funct6 << 10
+        # validate constraints
+        for c in cs or []:
+            c(rd_rs1=rd_rs1, rs2=rs2)
 
-    return code
+        return base | rs2 << 2 | rd_rs1 << 7
+    return encode
 
 
 # c.beqz, c.bnez
-def cb_type(rs1, imm, *, opcode, funct3, cs=None):
-    rs1 = lookup_register(rs1, compressed=True)
+def cb_type(*, opcode, funct3, cs=None):
+    base = opcode | funct3 << 13
 
-    # validate constraints
-    for c in cs or []:
-        c(rs1=rs1, imm=imm)
+    def encode(rs1, imm):
+        rs1 = lookup_register(rs1, compressed=True)
 
-    imm = imm >> 1
-    imm = c_uint32(imm).value & 0b11111111
+        # validate constraints
+        for c in cs or []:
+            c(rs1=rs1, imm=imm)
 
-    imm_8 = (imm >> 7) & 0b1
-    imm_7_6 = (imm >> 5) & 0b11
-    imm_5 = (imm >> 4) & 0b1
-    imm_4_3 = (imm >> 2) & 0b11
-    imm_2_1 = imm & 0b11
+        imm = imm >> 1
+        imm = imm & 0b11111111
 
-    code = 0
-    code |= opcode
-    code |= imm_5 << 2
-    code |= imm_2_1 << 3
-    code |= imm_7_6 << 5
-    code |= rs1 << 7
-    code |= imm_4_3 << 10
-    code |= imm_8 << 12
-    code |= funct3 << 13
+        imm_8 = (imm >> 7) & 0b1
+        imm_7_6 = (imm >> 5) & 0b11
+        imm_5 = (imm >> 4) & 0b1
+        imm_4_3 = (imm >> 2) & 0b11
+        imm_2_1 = imm & 0b11
 
-    return code
+        return (
+            base | imm_5 << 2 | imm_2_1 << 3 | imm_7_6 << 5 |
+            rs1 << 7 | imm_4_3 << 10 | imm_8 << 12
+        )
+    return encode
 
 
 # CB variation
 # c.srli, c.srai, c.andi
-def cbi_type(rd_rs1, imm, *, opcode, funct2, funct3, cs=None):
-    rd_rs1 = lookup_register(rd_rs1, compressed=True)
+def cbi_type(*, opcode, funct2, funct3, cs=None):
+    base = opcode | funct2 << 10 | funct3 << 13
 
-    # validate constraints
-    for c in cs or []:
-        c(rd_rs1=rd_rs1, imm=imm)
+    def encode(rd_rs1, imm):
+        rd_rs1 = lookup_register(rd_rs1, compressed=True)
 
-    imm = c_uint32(imm).value & 0b111111
+        # validate constraints
+        for c in cs or []:
+            c(rd_rs1=rd_rs1, imm=imm)
 
-    imm_5 = (imm >> 5) & 0b1
-    imm_4_0 = imm & 0b11111
+        imm = imm & 0b111111
 
-    code = 0
-    code |= opcode
-    code |= imm_4_0 << 2
-    code |= rd_rs1 << 7
-    code |= funct2 << 10
-    code |= imm_5 << 12
-    code |= funct3 << 13
+        imm_5 = (imm >> 5) & 0b1
+        imm_4_0 = imm & 0b11111
 
-    return code
+        return base | imm_4_0 << 2 | rd_rs1 << 7 | imm_5 << 12
+    return encode
 
 
 # c.jal, c.j
-def cj_type(imm, *, opcode, funct3, cs=None):
-    if imm < -2048 or imm > 2047:
-        raise ValueError('11-bit MO2 immediate must be between -0x800 (-2048) and 0x7ff (2047): {}'.format(imm))
-    if imm % 2 != 0:
-        raise ValueError('11-bit MO2 immediate must be a muliple of 2: {}'.format(imm))
-
-    # validate constraints
-    for c in cs or []:
-        c(imm=imm)
-
-    imm = imm >> 1
-    imm = c_uint32(imm).value & 0b11111111111
-
-    imm_11 = (imm >> 10) & 0b1
-    imm_10 = (imm >> 9) & 0b1
-    imm_9_8 = (imm >> 7) & 0b11
-    imm_7 = (imm >> 6) & 0b1
-    imm_6 = (imm >> 5) & 0b1
-    imm_5 = (imm >> 4) & 0b1
-    imm_4 = (imm >> 3) & 0b1
-    imm_3_1 = imm & 0b111
-
-    code = 0
-    code |= opcode
-    code |= imm_5 << 2
-    code |= imm_3_1 << 3
-    code |= imm_7 << 6
-    code |= imm_6 << 7
-    code |= imm_10 << 8
-    code |= imm_9_8 << 9
-    code |= imm_4 << 11
-    code |= imm_11 << 12
-    code |= funct3 << 13
-
-    return code
+def cj_type(*, opcode, funct3, cs=None):
+    base = opcode | funct3 << 13
+
+    def encode(imm):
+        if imm < -2048 or imm > 2047:
+            raise ValueError('11-bit MO2 immediate must be between -0x800 (-2048) and 0x7ff (2047): {}'.format(imm))
+        if imm % 2 != 0:
+            raise ValueError('11-bit MO2 immediate must be a muliple of 2: {}'.format(imm))
+
+        # validate constraints
+        for c in cs or []:
+            c(imm=imm)
+
+        imm = imm >> 1
+        imm = imm & 0b11111111111
+
+        imm_11 = (imm >> 10) & 0b1
+        imm_10 = (imm >> 9) & 0b1
+        imm_9_8 = (imm >> 7) & 0b11
+        imm_7 = (imm >> 6) & 0b1
+        imm_6 = (imm >> 5) & 0b1
+        imm_5 = (imm >> 4) & 0b1
+        imm_4 = (imm >> 3) & 0b1
+        imm_3_1 = imm & 0b111
+
+        return (
+            base | imm_5 << 2 | imm_3_1 << 3 | imm_7 << 6 | imm_6 << 7 |
+            imm_10 << 8 | imm_9_8 << 9 | imm_4 << 11 | imm_11 << 12
+        )
+    return encode
 
 
 # RV32I Base Integer Instruction Set
-LUI        = partial(u_type,   opcode=0b0110111)
-AUIPC      = partial(u_type,   opcode=0b0010111)
-JAL        = partial(j_type,   opcode=0b1101111)
-JALR       = partial(ij_type,  opcode=0b1100111, funct3=0b000)
-BEQ        = partial(b_type,   opcode=0b1100011, funct3=0b000)
-BNE        = partial(b_type,   opcode=0b1100011, funct3=0b001)
-BLT        = partial(b_type,   opcode=0b1100011, funct3=0b100)
-BGE        = partial(b_type,   opcode=0b1100011, funct3=0b101)
-BLTU       = partial(b_type,   opcode=0b1100011, funct3=0b110)
-BGEU       = partial(b_type,   opcode=0b1100011, funct3=0b111)
-LB         = partial(i_type,   opcode=0b0000011, funct3=0b000)
-LH         = partial(i_type,   opcode=0b0000011, funct3=0b001)
-LW         = partial(i_type,   opcode=0b0000011, funct3=0b010)
-LBU        = partial(i_type,   opcode=0b0000011, funct3=0b100)
-LHU        = partial(i_type,   opcode=0b0000011, funct3=0b101)
-SB         = partial(s_type,   opcode=0b0100011, funct3=0b000)
-SH         = partial(s_type,   opcode=0b0100011, funct3=0b001)
-SW         = partial(s_type,   opcode=0b0100011, funct3=0b010)
-ADDI       = partial(i_type,   opcode=0b0010011, funct3=0b000)
-SLTI       = partial(i_type,   opcode=0b0010011, funct3=0b010)
-SLTIU      = partial(i_type,   opcode=0b0010011, funct3=0b011)
-XORI       = partial(i_type,   opcode=0b0010011, funct3=0b100)
-ORI        = partial(i_type,   opcode=0b0010011, funct3=0b110)
-ANDI       = partial(i_type,   opcode=0b0010011, funct3=0b111)
-SLLI       = partial(r_type,   opcode=0b0010011, funct3=0b001, funct7=0b0000000)
-SRLI       = partial(r_type,   opcode=0b0010011, funct3=0b101, funct7=0b0000000)
-SRAI       = partial(r_type,   opcode=0b0010011, funct3=0b101, funct7=0b0100000)
-ADD        = partial(r_type,   opcode=0b0110011, funct3=0b000, funct7=0b0000000)
-SUB        = partial(r_type,   opcode=0b0110011, funct3=0b000, funct7=0b0100000)
-SLL        = partial(r_type,   opcode=0b0110011, funct3=0b001, funct7=0b0000000)
-SLT        = partial(r_type,   opcode=0b0110011, funct3=0b010, funct7=0b0000000)
-SLTU       = partial(r_type,   opcode=0b0110011, funct3=0b011, funct7=0b0000000)
-XOR        = partial(r_type,   opcode=0b0110011, funct3=0b100, funct7=0b0000000)
-SRL        = partial(r_type,   opcode=0b0110011, funct3=0b101, funct7=0b0000000)
-SRA        = partial(r_type,   opcode=0b0110011, funct3=0b101, funct7=0b0100000)
-OR         = partial(r_type,   opcode=0b0110011, funct3=0b110, funct7=0b0000000)
-AND        = partial(r_type,   opcode=0b0110011, funct3=0b111, funct7=0b0000000)
-FENCE      = partial(fence,    opcode=0b0001111, funct3=0b000, rd=0, rs1=0, fm=0)  # special syntax*
-ECALL      = partial(i_type,   opcode=0b1110011, funct3=0b000, rd=0, rs1=0, imm=0)  # special syntax
-EBREAK     = partial(i_type,   opcode=0b1110011, funct3=0b000, rd=0, rs1=0, imm=1)  # special syntax
+LUI        = u_type(opcode=0b0110111)
+AUIPC      = u_type(opcode=0b0010111)
+JAL        = j_type(opcode=0b1101111)
+JALR       = ij_type(opcode=0b1100111, funct3=0b000)
+BEQ        = b_type(opcode=0b1100011, funct3=0b000)
+BNE        = b_type(opcode=0b1100011, funct3=0b001)
+BLT        = b_type(opcode=0b1100011, funct3=0b100)
+BGE        = b_type(opcode=0b1100011, funct3=0b101)
+BLTU       = b_type(opcode=0b1100011, funct3=0b110)
+BGEU       = b_type(opcode=0b1100011, funct3=0b111)
+LB         = i_type(opcode=0b0000011, funct3=0b000)
+LH         = i_type(opcode=0b0000011, funct3=0b001)
+LW         = i_type(opcode=0b0000011, funct3=0b010)
+LBU        = i_type(opcode=0b0000011, funct3=0b100)
+LHU        = i_type(opcode=0b0000011, funct3=0b101)
+SB         = s_type(opcode=0b0100011, funct3=0b000)
+SH         = s_type(opcode=0b0100011, funct3=0b001)
+SW         = s_type(opcode=0b0100011, funct3=0b010)
+ADDI       = i_type(opcode=0b0010011, funct3=0b000)
+SLTI       = i_type(opcode=0b0010011, funct3=0b010)
+SLTIU      = i_type(opcode=0b0010011, funct3=0b011)
+XORI       = i_type(opcode=0b0010011, funct3=0b100)
+ORI        = i_type(opcode=0b0010011, funct3=0b110)
+ANDI       = i_type(opcode=0b0010011, funct3=0b111)
+SLLI       = r_type(opcode=0b0010011, funct3=0b001, funct7=0b0000000)
+SRLI       = r_type(opcode=0b0010011, funct3=0b101, funct7=0b0000000)
+SRAI       = r_type(opcode=0b0010011, funct3=0b101, funct7=0b0100000)
+ADD        = r_type(opcode=0b0110011, funct3=0b000, funct7=0b0000000)
+SUB        = r_type(opcode=0b0110011, funct3=0b000, funct7=0b0100000)
+SLL        = r_type(opcode=0b0110011, funct3=0b001, funct7=0b0000000)
+SLT        = r_type(opcode=0b0110011, funct3=0b010, funct7=0b0000000)
+SLTU       = r_type(opcode=0b0110011, funct3=0b011, funct7=0b0000000)
+XOR        = r_type(opcode=0b0110011, funct3=0b100, funct7=0b0000000)
+SRL        = r_type(opcode=0b0110011, funct3=0b101, funct7=0b0000000)
+SRA        = r_type(opcode=0b0110011, funct3=0b101, funct7=0b0100000)
+OR         = r_type(opcode=0b0110011, funct3=0b110, funct7=0b0000000)
+AND        = r_type(opcode=0b0110011, funct3=0b111, funct7=0b0000000)
+FENCE      = fence(opcode=0b0001111, funct3=0b000, rd=0, rs1=0, fm=0)  # special syntax*
+ECALL      = ie_type(opcode=0b1110011, funct3=0b000, imm=0)  # special syntax
+EBREAK     = ie_type(opcode=0b1110011, funct3=0b000, imm=1)  # special syntax
 
 # RV32/RV64 "Zifencei" Instruction-Fetch Fence
-FENCE_I    = partial(i_type,   opcode=0b0001111, funct3=0b001, rd=0, rs1=0, imm=0)  # special syntax
+FENCE_I    = ie_type(opcode=0b0001111, funct3=0b001, imm=0)  # special syntax
 
 # RV32/RV64 "Zicsr" Control and Status Register (CSR) Instructions
-CSRRW      = partial(i_type,   opcode=0b1110011, funct3=0b001)
-CSRRS      = partial(i_type,   opcode=0b1110011, funct3=0b010)
-CSRRC      = partial(i_type,   opcode=0b1110011, funct3=0b011)
-CSRRWI     = partial(i_type,   opcode=0b1110011, funct3=0b101)
-CSRRSI     = partial(i_type,   opcode=0b1110011, funct3=0b110)
-CSRRCI     = partial(i_type,   opcode=0b1110011, funct3=0b111)
+CSRRW      = i_type(opcode=0b1110011, funct3=0b001)
+CSRRS      = i_type(opcode=0b1110011, funct3=0b010)
+CSRRC      = i_type(opcode=0b1110011, funct3=0b011)
+CSRRWI     = i_type(opcode=0b1110011, funct3=0b101)
+CSRRSI     = i_type(opcode=0b1110011, funct3=0b110)
+CSRRCI     = i_type(opcode=0b1110011, funct3=0b111)
 
 # RV32M Standard Extension for Integer Multiplication and Division
-MUL        = partial(r_type,   opcode=0b0110011, funct3=0b000, funct7=0b0000001)
-MULH       = partial(r_type,   opcode=0b0110011, funct3=0b001, funct7=0b0000001)
-MULHSU     = partial(r_type,   opcode=0b0110011, funct3=0b010, funct7=0b0000001)
-MULHU      = partial(r_type,   opcode=0b0110011, funct3=0b011, funct7=0b0000001)
-DIV        = partial(r_type,   opcode=0b0110011, funct3=0b100, funct7=0b0000001)
-DIVU       = partial(r_type,   opcode=0b0110011, funct3=0b101, funct7=0b0000001)
-REM        = partial(r_type,   opcode=0b0110011, funct3=0b110, funct7=0b0000001)
-REMU       = partial(r_type,   opcode=0b0110011, funct3=0b111, funct7=0b0000001)
+MUL        = r_type(opcode=0b0110011, funct3=0b000, funct7=0b0000001)
+MULH       = r_type(opcode=0b0110011, funct3=0b001, funct7=0b0000001)
+MULHSU     = r_type(opcode=0b0110011, funct3=0b010, funct7=0b0000001)
+MULHU      = r_type(opcode=0b0110011, funct3=0b011, funct7=0b0000001)
+DIV        = r_type(opcode=0b0110011, funct3=0b100, funct7=0b0000001)
+DIVU       = r_type(opcode=0b0110011, funct3=0b101, funct7=0b0000001)
+REM        = r_type(opcode=0b0110011, funct3=0b110, funct7=0b0000001)
+REMU       = r_type(opcode=0b0110011, funct3=0b111, funct7=0b0000001)
 
 # RV32A Standard Extension for Atomic Instructions
-LR_W       = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b00010, rs2=0)  # special syntax
-SC_W       = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b00011)
-AMOSWAP_W  = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b00001)
-AMOADD_W   = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b00000)
-AMOXOR_W   = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b00100)
-AMOAND_W   = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b01100)
-AMOOR_W    = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b01000)
-AMOMIN_W   = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b10000)
-AMOMAX_W   = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b10100)
-AMOMINU_W  = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b11000)
-AMOMAXU_W  = partial(a_type,   opcode=0b0101111, funct3=0b010, funct5=0b11100)
+LR_W       = al_type(opcode=0b0101111, funct3=0b010, funct5=0b00010)  # special syntax
+SC_W       = a_type(opcode=0b0101111, funct3=0b010, funct5=0b00011)
+AMOSWAP_W  = a_type(opcode=0b0101111, funct3=0b010, funct5=0b00001)
+AMOADD_W   = a_type(opcode=0b0101111, funct3=0b010, funct5=0b00000)
+AMOXOR_W   = a_type(opcode=0b0101111, funct3=0b010, funct5=0b00100)
+AMOAND_W   = a_type(opcode=0b0101111, funct3=0b010, funct5=0b01100)
+AMOOR_W    = a_type(opcode=0b0101111, funct3=0b010, funct5=0b01000)
+AMOMIN_W   = a_type(opcode=0b0101111, funct3=0b010, funct5=0b10000)
+AMOMAX_W   = a_type(opcode=0b0101111, funct3=0b010, funct5=0b10100)
+AMOMINU_W  = a_type(opcode=0b0101111, funct3=0b010, funct5=0b11000)
+AMOMAXU_W  = a_type(opcode=0b0101111, funct3=0b010, funct5=0b11100)
 
 # RV32C Standard Extension for Compressed Instructions
-C_ADDI4SPN = partial(ciw_type, opcode=0b00, funct3=0b000, cs=[ImmNotZero])
-C_LW       = partial(cl_type,  opcode=0b00, funct3=0b010)
-C_SW       = partial(cs_type,  opcode=0b00, funct3=0b110)
-C_NOP      = partial(ci_type,  opcode=0b01, funct3=0b000, rd_rs1=0, imm=0)  # special syntax
-C_ADDI     = partial(ci_type,  opcode=0b01, funct3=0b000, cs=[RegRdRs1NotZero, ImmNotZero])
-C_JAL      = partial(cj_type,  opcode=0b01, funct3=0b001)
-C_LI       = partial(ci_type,  opcode=0b01, funct3=0b010, cs=[RegRdRs1NotZero])
-C_ADDI16SP = partial(cia_type, opcode=0b01, funct3=0b011, cs=[ImmNotZero])  # special syntax
-C_LUI      = partial(ciu_type, opcode=0b01, funct3=0b011, cs=[RegRdRs1NotZero, RegRdRs1NotTwo, ImmNotZero])
-C_SRLI     = partial(cbi_type, opcode=0b01, funct2=0b00, funct3=0b100, cs=[ImmNotZero])
-C_SRAI     = partial(cbi_type, opcode=0b01, funct2=0b01, funct3=0b100, cs=[ImmNotZero])
-C_ANDI     = partial(cbi_type, opcode=0b01, funct2=0b10, funct3=0b100)
-C_SUB      = partial(ca_type,  opcode=0b01, funct2=0b00, funct6=0b100011)
-C_XOR      = partial(ca_type,  opcode=0b01, funct2=0b01, funct6=0b100011)
-C_OR       = partial(ca_type,  opcode=0b01, funct2=0b10, funct6=0b100011)
-C_AND      = partial(ca_type,  opcode=0b01, funct2=0b11, funct6=0b100011)
-C_J        = partial(cj_type,  opcode=0b01, funct3=0b101)
-C_BEQZ     = partial(cb_type,  opcode=0b01, funct3=0b110)
-C_BNEZ     = partial(cb_type,  opcode=0b01, funct3=0b111)
-C_SLLI     = partial(ci_type,  opcode=0b10, funct3=0b000, cs=[RegRdRs1NotZero, ImmNotZero])
-C_LWSP     = partial(cil_type, opcode=0b10, funct3=0b010, cs=[RegRdRs1NotZero])
-C_JR       = partial(cr_type,  opcode=0b10, funct4=0b1000, rs2=0, cs=[RegRdRs1NotZero])  # special syntax
-C_MV       = partial(cr_type,  opcode=0b10, funct4=0b1000, cs=[RegRdRs1NotZero, RegRs2NotZero])
-C_EBREAK   = partial(cr_type,  opcode=0b10, funct4=0b1001, rd_rs1=0, rs2=0)  # special syntax
-C_JALR     = partial(cr_type,  opcode=0b10, funct4=0b1001, rs2=0, cs=[RegRdRs1NotZero])  # special syntax
-C_ADD      = partial(cr_type,  opcode=0b10, funct4=0b1001, cs=[RegRdRs1NotZero, RegRs2NotZero])
-C_SWSP     = partial(css_type, opcode=0b10, funct3=0b110)
+C_ADDI4SPN = ciw_type(opcode=0b00, funct3=0b000, cs=[ImmNotZero])
+C_LW       = cl_type(opcode=0b00, funct3=0b010)
+C_SW       = cs_type(opcode=0b00, funct3=0b110)
+C_NOP      = cin_type(opcode=0b01, funct3=0b000)  # special syntax
+C_ADDI     = ci_type(opcode=0b01, funct3=0b000, cs=[RegRdRs1NotZero, ImmNotZero])
+C_JAL      = cj_type(opcode=0b01, funct3=0b001)
+C_LI       = ci_type(opcode=0b01, funct3=0b010, cs=[RegRdRs1NotZero])
+C_ADDI16SP = cia_type(opcode=0b01, funct3=0b011, cs=[ImmNotZero])  # special syntax
+C_LUI      = ciu_type(opcode=0b01, funct3=0b011, cs=[RegRdRs1NotZero, RegRdRs1NotTwo, ImmNotZero])
+C_SRLI     = cbi_type(opcode=0b01, funct2=0b00, funct3=0b100, cs=[ImmNotZero])
+C_SRAI     = cbi_type(opcode=0b01, funct2=0b01, funct3=0b100, cs=[ImmNotZero])
+C_ANDI     = cbi_type(opcode=0b01, funct2=0b10, funct3=0b100)
+C_SUB      = ca_type(opcode=0b01, funct2=0b00, funct6=0b100011)
+C_XOR      = ca_type(opcode=0b01, funct2=0b01, funct6=0b100011)
+C_OR       = ca_type(opcode=0b01, funct2=0b10, funct6=0b100011)
+C_AND      = ca_type(opcode=0b01, funct2=0b11, funct6=0b100011)
+C_J        = cj_type(opcode=0b01, funct3=0b101)
+C_BEQZ     = cb_type(opcode=0b01, funct3=0b110)
+C_BNEZ     = cb_type(opcode=0b01, funct3=0b111)
+C_SLLI     = ci_type(opcode=0b10, funct3=0b000, cs=[RegRdRs1NotZero, ImmNotZero])
+C_LWSP     = cil_type(opcode=0b10, funct3=0b010, cs=[RegRdRs1NotZero])
+C_JR       = crj_type(opcode=0b10, funct4=0b1000, cs=[RegRdRs1NotZero])  # special syntax
+C_MV       = cr_type(opcode=0b10, funct4=0b1000, cs=[RegRdRs1NotZero, RegRs2NotZero])
+C_EBREAK   = cre_type(opcode=0b10, funct4=0b1001)  # special syntax
+C_JALR     = crj_type(opcode=0b10, funct4=0b1001, cs=[RegRdRs1NotZero])  # special syntax
+C_ADD      = cr_type(opcode=0b10, funct4=0b1001, cs=[RegRdRs1NotZero, RegRs2NotZero])
+C_SWSP     = css_type(opcode=0b10, funct3=0b110)
 
 
 R_TYPE_INSTRUCTIONS = {
@@ -1003,6 +994,37 @@ INSTRUCTIONS.update(CA_TYPE_INSTRUCTIONS)
 INSTRUCTIONS.update(CB_TYPE_INSTRUCTIONS)
 INSTRUCTIONS.update(CJ_TYPE_INSTRUCTIONS)
 
+# map each instruction name to its kind (lets the parser dispatch with one lookup)
+INSTRUCTION_KINDS = {
+    name: kind
+    for kind, insts in [
+        ('r', R_TYPE_INSTRUCTIONS),
+        ('i', I_TYPE_INSTRUCTIONS),
+        ('ie', IE_TYPE_INSTRUCTIONS),
+        ('s', S_TYPE_INSTRUCTIONS),
+        ('b', B_TYPE_INSTRUCTIONS),
+        ('u', U_TYPE_INSTRUCTIONS),
+        ('j', J_TYPE_INSTRUCTIONS),
+        ('fence', FENCE_INSTRUCTIONS),
+        ('a', A_TYPE_INSTRUCTIONS),
+        ('al', AL_TYPE_INSTRUCTIONS),
+        ('cr', CR_TYPE_INSTRUCTIONS),
+        ('crj', CRJ_TYPE_INSTRUCTIONS),
+        ('cre', CRE_TYPE_INSTRUCTIONS),
+        ('ci', CI_TYPE_INSTRUCTIONS),
+        ('cia', CIA_TYPE_INSTRUCTIONS),
+        ('cin', CIN_TYPE_INSTRUCTIONS),
+        ('css', CSS_TYPE_INSTRUCTIONS),
+        ('ciw', CIW_TYPE_INSTRUCTIONS),
+        ('cl', CL_TYPE_INSTRUCTIONS),
+        ('cs', CS_TYPE_INSTRUCTIONS),
+        ('ca', CA_TYPE_INSTRUCTIONS),
+        ('cb', CB_TYPE_INSTRUCTIONS),
+        ('cj', CJ_TYPE_INSTRUCTIONS),
+    ]
+    for name in insts
+}
+
 PSEUDO_INSTRUCTIONS = {
     'nop',
     'li',
@@ -1124,6 +1146,15 @@ class Expr(abc.ABC):
         """Evaluate an expression to an integer"""
 
 
+RE_DECIMAL = re.compile(r'-?[1-9][0-9]*|0')
+
+
+# the same exprs get evaluated many times across passes, only compile them once
+@lru_cache(maxsize=1024)
+def compile_expr(expr):
+    return compile(expr, '<expr>', 'eval')
+
+
 # basic arithmetic expression
 # defers evaulation to Python's builtin eval (RIP double-slash comments)
 class Arithmetic(Expr):
@@ -1152,10 +1183,14 @@ class Arithmetic(Expr):
             except TypeError:
                 raise AssemblerError('invalid char literal in expr: "{}"'.format(self.expr), line)
 
+        # check for plain decimal integers (no need to eval these)
+        if RE_DECIMAL.fullmatch(self.expr):
+            return int(self.expr)
+
         try:
             # exclude Python builtins from eval env
             # https://docs.python.org/3/library/functions.html#eval
-            result = eval(self.expr, {'__builtins__': None}, env)
+            result = eval(compile_expr(self.expr), {'__builtins__': None}, env)
         except SyntaxError:
             raise AssemblerError('invalid syntax in expr: "{}"'.format(self.expr), line)
         except TypeError:
@@ -1265,6 +1300,8 @@ class Lo(Expr):
 # base class for assembly "things"
 class Item(abc.ABC):
 
+    __slots__ = ('line',)
+
     def __init__(self, line):
         self.line = line
 
@@ -1275,6 +1312,8 @@ class Item(abc.ABC):
 
 class Label(Item):
 
+    __slots__ = ('name',)
+
     def __init__(self, line, name):
         super().__init__(line)
         self.name = name
@@ -1295,6 +1334,8 @@ class Label(Item):
 
 class Constant(Item):
 
+    __slots__ = ('name', 'expr')
+
     def __init__(self, line, name, expr):
         super().__init__(line)
         self.name = name
@@ -1316,6 +1357,8 @@ class Constant(Item):
 
 class IncludeBytes(Item):
 
+    __slots__ = ('path', 'fsize')
+
     def __init__(self, line, path, fsize):
         super().__init__(line)
         self.path = path
@@ -1337,6 +1380,8 @@ class IncludeBytes(Item):
 
 class String(Item):
 
+    __slots__ = ('value',)
+
     def __init__(self, line, value):
         super().__init__(line)
         self.value = value
@@ -1357,6 +1402,8 @@ class String(Item):
 
 class Sequence(Item):
 
+    __slots__ = ('name', 'values')
+
     def __init__(self, line, name, values):
         super().__init__(line)
         self.name = name
@@ -1385,6 +1432,8 @@ class Sequence(Item):
 
 class Pack(Item):
 
+    __slots__ = ('fmt', 'imm')
+
     def __init__(self, line, fmt, imm):
         super().__init__(line)
         self.fmt = fmt
@@ -1406,6 +1455,8 @@ class Pack(Item):
 
 class ShorthandPack(Item):
 
+    __slots__ = ('name', 'imm')
+
     def __init__(self, line, name, imm):
         super().__init__(line)
         self.name = name
@@ -1433,6 +1484,8 @@ class ShorthandPack(Item):
 
 class Align(Item):
 
+    __slots__ = ('alignment',)
+
     def __init__(self, line, alignment):
         super().__init__(line)
         self.alignment = alignment
@@ -1461,6 +1514,8 @@ class Align(Item):
 
 class Blob(Item):
 
+    __slots__ = ('data',)
+
     def __init__(self, line, data):
         super().__init__(line)
         self.data = data
@@ -1491,6 +1546,8 @@ class Blob(Item):
 
 class Instruction(Item):
 
+    __slots__ = ()
+
     def size(self):
         return 4
 
@@ -1501,6 +1558,8 @@ class Instruction(Item):
 
 class PseudoInstruction(Instruction):
 
+    __slots__ = ('name', 'args')
+
     def __init__(self, line, name, *args):
         super().__init__(line)
         self.name = name
@@ -1518,9 +1577,6 @@ class PseudoInstruction(Instruction):
         s = s.format(self.name, list(self.args))
         return s
 
-    def args(self):
-        return self.args
-
     def size(self):
         # intentionally pessimistic here (may get shrunk after transform)
         # some pseudo-instructions expand into 2 regular ones
@@ -1532,6 +1588,8 @@ class PseudoInstruction(Instruction):
 
 class RTypeInstruction(Instruction):
 
+    __slots__ = ('name', 'rd', 'rs1', 'rs2')
+
     def __init__(self, line, name, rd, rs1, rs2):
         super().__init__(line)
         self.name = name
@@ -1555,6 +1613,8 @@ class RTypeInstruction(Instruction):
 
 class ITypeInstruction(Instruction):
 
+    __slots__ = ('name', 'rd', 'rs1', 'imm', 'is_auipc_jump')
+
     def __init__(self, line, name, rd, rs1, imm, is_auipc_jump=False):
         super().__init__(line)
         self.name = name
@@ -1580,6 +1640,8 @@ class ITypeInstruction(Instruction):
 # custom syntax for: ecall, ebreak, fence.i
 class IETypeInstruction(Instruction):
 
+    __slots__ = ('name',)
+
     def __init__(self, line, name):
         super().__init__(line)
         self.name = name
@@ -1600,6 +1662,8 @@ class IETypeInstruction(Instruction):
 
 class STypeInstruction(Instruction):
 
+    __slots__ = ('name', 'rs1', 'rs2', 'imm')
+
     def __init__(self, line, name, rs1, rs2, imm):
         super().__init__(line)
         self.name = name
@@ -1623,6 +1687,8 @@ class STypeInstruction(Instruction):
 
 class BTypeInstruction(Instruction):
 
+    __slots__ = ('name', 'rs1', 'rs2', 'imm')
+
     def __init__(self, line, name, rs1, rs2, imm):
         super().__init__(line)
         self.name = name
@@ -1646,6 +1712,8 @@ class BTypeInstruction(Instruction):
 
 class UTypeInstruction(Instruction):
 
+    __slots__ = ('name', 'rd', 'imm')
+
     def __init__(self, line, name, rd, imm):
         super().__init__(line)
         self.name = name
@@ -1668,6 +1736,8 @@ class UTypeInstruction(Instruction):
 
 class JTypeInstruction(Instruction):
 
+    __slots__ = ('name', 'rd', 'imm')
+
     def __init__(self, line, name, rd, imm):
         super().__init__(line)
         self.name = name
@@ -1691,6 +1761,8 @@ class JTypeInstruction(Instruction):
 # custom syntax for: fence
 class FenceInstruction(Instruction):
 
+    __slots__ = ('name', 'succ', 'pred')
+
     def __init__(self, line, name, succ, pred):
         super().__init__(line)
         self.name = name
@@ -1713,6 +1785,8 @@ class FenceInstruction(Instruction):
 
 class ATypeInstruction(Instruction):
 
+    __slots__ = ('name', 'rd', 'rs1', 'rs2', 'aq', 'rl')
+
     def __init__(self, line, name, rd, rs1, rs2, aq=0, rl=0):
         super().__init__(line)
         self.name = name
@@ -1739,6 +1813,8 @@ class ATypeInstruction(Instruction):
 # custom syntax for: lr.w
 class ALTypeInstruction(Instruction):
 
+    __slots__ = ('name', 'rd', 'rs1', 'aq', 'rl')
+
     def __init__(self, line, name, rd, rs1, aq=0, rl=0):
         super().__init__(line)
         self.name = name
@@ -1763,12 +1839,16 @@ class ALTypeInstruction(Instruction):
 
 class CompressedInstruction(Instruction):
 
+    __slots__ = ()
+
     def size(self):
         return 2
 
 
 class CRTypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'rd_rs1', 'rs2')
+
     def __init__(self, line, name, rd_rs1, rs2):
         super().__init__(line)
         self.name = name
@@ -1792,6 +1872,8 @@ class CRTypeInstruction(CompressedInstruction):
 # custom syntax for: c.jr, c.jalr
 class CRJTypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'rd_rs1', 'is_auipc_jump')
+
     def __init__(self, line, name, rd_rs1, is_auipc_jump=False):
         super().__init__(line)
         self.name = name
@@ -1815,6 +1897,8 @@ class CRJTypeInstruction(CompressedInstruction):
 # custom syntax for: c.ebreak
 class CRETypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name',)
+
     def __init__(self, line, name):
         super().__init__(line)
         self.name = name
@@ -1835,6 +1919,8 @@ class CRETypeInstruction(CompressedInstruction):
 
 class CITypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'rd_rs1', 'imm')
+
     def __init__(self, line, name, rd_rs1, imm):
         super().__init__(line)
         self.name = name
@@ -1858,6 +1944,8 @@ class CITypeInstruction(CompressedInstruction):
 # custom syntax for: c.addi16sp
 class CIATypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'imm')
+
     def __init__(self, line, name, imm):
         super().__init__(line)
         self.name = name
@@ -1880,6 +1968,8 @@ class CIATypeInstruction(CompressedInstruction):
 # custom syntax for: c.nop
 class CINTypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name',)
+
     def __init__(self, line, name):
         super().__init__(line)
         self.name = name
@@ -1900,6 +1990,8 @@ class CINTypeInstruction(CompressedInstruction):
 
 class CSSTypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'rs2', 'imm')
+
     def __init__(self, line, name, rs2, imm):
         super().__init__(line)
         self.name = name
@@ -1922,6 +2014,8 @@ class CSSTypeInstruction(CompressedInstruction):
 
 class CIWTypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'rd', 'imm')
+
     def __init__(self, line, name, rd, imm):
         super().__init__(line)
         self.name = name
@@ -1944,6 +2038,8 @@ class CIWTypeInstruction(CompressedInstruction):
 
 class CLTypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'rd', 'rs1', 'imm')
+
     def __init__(self, line, name, rd, rs1, imm):
         super().__init__(line)
         self.name = name
@@ -1967,6 +2063,8 @@ class CLTypeInstruction(CompressedInstruction):
 
 class CSTypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'rs1', 'rs2', 'imm')
+
     def __init__(self, line, name, rs1, rs2, imm):
         super().__init__(line)
         self.name = name
@@ -1990,6 +2088,8 @@ class CSTypeInstruction(CompressedInstruction):
 
 class CATypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'rd_rs1', 'rs2')
+
     def __init__(self, line, name, rd_rs1, rs2):
         super().__init__(line)
         self.name = name
@@ -2012,6 +2112,8 @@ class CATypeInstruction(CompressedInstruction):
 
 class CBTypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'rs1', 'imm')
+
     def __init__(self, line, name, rs1, imm):
         super().__init__(line)
         self.name = name
@@ -2034,6 +2136,8 @@ class CBTypeInstruction(CompressedInstruction):
 
 class CJTypeInstruction(CompressedInstruction):
 
+    __slots__ = ('name', 'imm')
+
     def __init__(self, line, name, imm):
         super().__init__(line)
         self.name = name
@@ -2096,7 +2200,7 @@ def read_lines(path_or_source, *, include=False, include_dirs=None):
         if raw_line.lower().startswith('include '):
             try:
                 # strip any comments from the include line
-                raw_include = re.sub(r'#.*$', r'', raw_line)
+                raw_include = raw_line.partition('#')[0]
                 # isolate the path
                 _, rel_path = raw_include.split()
                 # strip any leading / trailing quotes
@@ -2135,10 +2239,13 @@ def read_lines(path_or_source, *, include=False, include_dirs=None):
     return lines
 
 
-def lex_tokens(line):
-    RE_ERROR = re.compile(r'\s*error (.*)')
-    RE_STRING = re.compile(r'\s*string (.*)')
+RE_ERROR = re.compile(r'\s*error (.*)')
+RE_STRING = re.compile(r'\s*string (.*)')
+# parens are tokens on their own, whitespace and commas only separate
+RE_TOKEN = re.compile(r'[()]|[^\s,()]+')
 
+
+def lex_tokens(line):
     # simplify lexing a single string
     if type(line) == str:
         line = Line('<string>', 1, line)
@@ -2160,24 +2267,10 @@ def lex_tokens(line):
         return LineTokens(line, tokens)
 
     # strip comments
-    contents = re.sub(r'#.*$', r'', line.contents)
-
-    # pad parens before split
-    contents = contents.replace('(', ' ( ').replace(')', ' ) ')
-
-    # strip whitespace
-    contents = contents.strip()
-
-    # skip empty lines
-    if len(contents) == 0:
-        return LineTokens(line, [])
+    contents = line.contents.partition('#')[0]
 
-    # split line into tokens
-    tokens = re.split(r'[\s,]+', contents)
-
-    # remove empty tokens
-    while '' in tokens:
-        tokens.remove('')
+    # split line into tokens (empty lines yield no tokens)
+    tokens = RE_TOKEN.findall(contents)
 
     # carry the line and its tokens forward
     return LineTokens(line, tokens)
@@ -2221,6 +2314,7 @@ def parse_item(line_tokens):
     line = line_tokens.line
     tokens = line_tokens.tokens
     head = tokens[0].lower()
+    kind = INSTRUCTION_KINDS.get(head)
 
     # labels
     if len(tokens) == 1 and tokens[0].endswith(':'):
@@ -2249,7 +2343,7 @@ def parse_item(line_tokens):
     # sequences
     elif head in NUMERIC_SEQUENCE_NAMES:
         name, *values = tokens
-        name = name.lower()
+        name = head
         return Sequence(line, name, values)
     # packs
     elif head == 'pack':
@@ -2270,48 +2364,48 @@ def parse_item(line_tokens):
             raise AssemblerError('alignment must be an integer', line)
         return Align(line, alignment)
     # r-type instructions
-    elif head in R_TYPE_INSTRUCTIONS:
+    elif kind == 'r':
         if len(tokens) != 4:
             raise AssemblerError('r-type instructions require exactly 3 args', line)
         name, rd, rs1, rs2 = tokens
-        name = name.lower()
+        name = head
         return RTypeInstruction(line, name, rd, rs1, rs2)
     # i-type instructions
-    elif head in I_TYPE_INSTRUCTIONS:
+    elif kind == 'i':
         # check for jalr PI
         if len(tokens) == 2:
             name, *args = tokens
-            name = name.lower()
+            name = head
             return PseudoInstruction(line, name, *args)
-        if tokens[0].lower() in BASE_OFFSET_INSTRUCTIONS and tokens[3] == '(':
+        if head in BASE_OFFSET_INSTRUCTIONS and tokens[3] == '(':
             name, rd, offset, _, rs1, _ = tokens
             imm = [offset]
         else:
             name, rd, rs1, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return ITypeInstruction(line, name, rd, rs1, imm)
     # ie-type instructions
-    elif head in IE_TYPE_INSTRUCTIONS:
+    elif kind == 'ie':
         name, = tokens
-        name = name.lower()
+        name = head
         return IETypeInstruction(line, name)
     # s-type instructions (all are base offset insts)
-    elif head in S_TYPE_INSTRUCTIONS:
+    elif kind == 's':
         if tokens[3] == '(':
             name, rs2, offset, _, rs1, _ = tokens
             imm = [offset]
         else:
             name, rs1, rs2, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return STypeInstruction(line, name, rs1, rs2, imm)
     # b-type instructions
-    elif head in B_TYPE_INSTRUCTIONS:
+    elif kind == 'b':
         if len(tokens) != 4:
             raise AssemblerError('b-type instructions require 3 args', line)
         name, rs1, rs2, reference = tokens
-        name = name.lower()
+        name = head
         if is_int(reference):
             imm = [reference]
         else:
@@ -2320,22 +2414,22 @@ def parse_item(line_tokens):
         imm = parse_immediate(imm, line)
         return BTypeInstruction(line, name, rs1, rs2, imm)
     # u-type instructions
-    elif head in U_TYPE_INSTRUCTIONS:
+    elif kind == 'u':
         name, rd, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return UTypeInstruction(line, name, rd, imm)
     # j-type instructions
-    elif head in J_TYPE_INSTRUCTIONS:
+    elif kind == 'j':
         # check for jal PI
         if len(tokens) == 2:
             name, *args = tokens
-            name = name.lower()
+            name = head
             return PseudoInstruction(line, name, *args)
         if len(tokens) != 3:
             raise AssemblerError('j-type instructions require 1 or 2 args', line)
         name, rd, reference = tokens
-        name = name.lower()
+        name = head
         if is_int(reference):
             imm = [reference]
         else:
@@ -2344,21 +2438,21 @@ def parse_item(line_tokens):
         imm = parse_immediate(imm, line)
         return JTypeInstruction(line, name, rd, imm)
     # fence instructions
-    elif head in FENCE_INSTRUCTIONS:
+    elif kind == 'fence':
         # check for fence PI
         if len(tokens) == 1:
             name, *args = tokens
-            name = name.lower()
+            name = head
             return PseudoInstruction(line, name, *args)
         if len(tokens) != 3:
             raise AssemblerError('fence instructions require 0 or 2 args', line)
         name, succ, pred = tokens
-        name = name.lower()
+        name = head
         return FenceInstruction(line, name, succ, pred)
     # a-type instructions
-    elif head in A_TYPE_INSTRUCTIONS:
+    elif kind == 'a':
         name, rd, rs1, rs2, *ordering = tokens
-        name = name.lower()
+        name = head
         # check for specific ordering bits
         if len(ordering) == 0:
             aq, rl = 0, 0
@@ -2368,9 +2462,9 @@ def parse_item(line_tokens):
             raise AssemblerError('invalid syntax for atomic instruction', line)
         return ATypeInstruction(line, name, rd, rs1, rs2, aq, rl)
     # al-type instructions
-    elif head in AL_TYPE_INSTRUCTIONS:
+    elif kind == 'al':
         name, rd, rs1, *ordering = tokens
-        name = name.lower()
+        name = head
         # check for specific ordering bits
         if len(ordering) == 0:
             aq, rl = 0, 0
@@ -2380,100 +2474,100 @@ def parse_item(line_tokens):
             raise AssemblerError('invalid syntax for atomic instruction', line)
         return ALTypeInstruction(line, name, rd, rs1, aq, rl)
     # cr-type instructions
-    elif head in CR_TYPE_INSTRUCTIONS:
+    elif kind == 'cr':
         if len(tokens) != 3:
             raise AssemblerError('cr-type instructions require exactly 2 args', line)
         name, rd_rs1, rs2 = tokens
-        name = name.lower()
+        name = head
         return CRTypeInstruction(line, name, rd_rs1, rs2)
     # crj-type instructions
-    elif head in CRJ_TYPE_INSTRUCTIONS:
+    elif kind == 'crj':
         if len(tokens) != 2:
             raise AssemblerError('crj-type instructions require exactly 1 arg', line)
         name, rd_rs1 = tokens
-        name = name.lower()
+        name = head
         return CRJTypeInstruction(line, name, rd_rs1)
     # cre-type instructions
-    elif head in CRE_TYPE_INSTRUCTIONS:
+    elif kind == 'cre':
         if len(tokens) != 1:
             raise AssemblerError('cre-type instructions require no args', line)
         name, = tokens
-        name = name.lower()
+        name = head
         return CRETypeInstruction(line, name)
     # ci-type instructions
-    elif head in CI_TYPE_INSTRUCTIONS:
+    elif kind == 'ci':
         name, rd_rs1, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return CITypeInstruction(line, name, rd_rs1, imm)
     # cia-type instructions
-    elif head in CIA_TYPE_INSTRUCTIONS:
+    elif kind == 'cia':
         name, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return CIATypeInstruction(line, name, imm)
     # cin-type instructions
-    elif head in CIN_TYPE_INSTRUCTIONS:
+    elif kind == 'cin':
         if len(tokens) != 1:
             raise AssemblerError('cin-type instructions require no args', line)
         name, = tokens
-        name = name.lower()
+        name = head
         return CINTypeInstruction(line, name)
     # css-type instructions
-    elif head in CSS_TYPE_INSTRUCTIONS:
+    elif kind == 'css':
         name, rs2, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return CSSTypeInstruction(line, name, rs2, imm)
     # ciw-type instructions
-    elif head in CIW_TYPE_INSTRUCTIONS:
+    elif kind == 'ciw':
         name, rd, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return CIWTypeInstruction(line, name, rd, imm)
     # cl-type instructions (all are base offset insts)
-    elif head in CL_TYPE_INSTRUCTIONS:
+    elif kind == 'cl':
         if tokens[3] == '(':
             name, rd, offset, _, rs1, _ = tokens
             imm = [offset]
         else:
             name, rd, rs1, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return CLTypeInstruction(line, name, rd, rs1, imm)
     # cs-type instructions (all are base offset insts)
-    elif head in CS_TYPE_INSTRUCTIONS:
+    elif kind == 'cs':
         if tokens[3] == '(':
             name, rs2, offset, _, rs1, _ = tokens
             imm = [offset]
         else:
             name, rs1, rs2, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return CSTypeInstruction(line, name, rs1, rs2, imm)
     # ca-type instructions
-    elif head in CA_TYPE_INSTRUCTIONS:
+    elif kind == 'ca':
         if len(tokens) != 3:
             raise AssemblerError('ca-type instructions require exactly 2 args', line)
         name, rd_rs1, rs2 = tokens
-        name = name.lower()
+        name = head
         return CATypeInstruction(line, name, rd_rs1, rs2)
     # cb-type instructions
-    elif head in CB_TYPE_INSTRUCTIONS:
+    elif kind == 'cb':
         name, rs1, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return CBTypeInstruction(line, name, rs1, imm)
     # cj-type instructions
-    elif head in CJ_TYPE_INSTRUCTIONS:
+    elif kind == 'cj':
         name, *imm = tokens
-        name = name.lower()
+        name = head
         imm = parse_immediate(imm, line)
         return CJTypeInstruction(line, name, imm)
     # pseudo instructions
     elif head in PSEUDO_INSTRUCTIONS:
         name, *args = tokens
-        name = name.lower()
+        name = head
         return PseudoInstruction(line, name, *args)
     else:
         raise AssemblerError('invalid syntax (expected constant, label, or instruction)', line)
@@ -2511,54 +2605,43 @@ def resolve_constants(items, constants):
 
 
 def resolve_labels(items, labels):
-    position = 0
-    new_items = []
-    for item in items:
-        if not isinstance(item, Label):
-            position += item.size()
-            new_items.append(item)
-            continue
+    # each item's position is the total size of the items before it
+    positions = accumulate([0] + [item.size() for item in items])
+    labels.update({
+        item.name: position
+        for item, position in zip(items, positions)
+        if isinstance(item, Label)
+    })
 
-        labels[item.name] = position
-
-    return new_items
+    return [item for item in items if not isinstance(item, Label)]
 
 
 def resolve_register_aliases(items, constants):
-    REGS = {'rd', 'rs1', 'rs2', 'rd_rs1'}
+    REGS = ['rd', 'rs1', 'rs2', 'rd_rs1']
 
     new_items = []
     for item in items:
-        d = copy.deepcopy(vars(item))
-
-        # skip items without any register fields
-        if not set(d.keys()) & REGS:
-            new_items.append(item)
-            continue
-
-        # resolve all fields that are registers
-        modified = False
+        # resolve all register fields that are constants
         resolved_regs = {}
-        for key, value in d.items():
-            # skip if item field is not a register
-            if key not in REGS:
+        for key in REGS:
+            # skip if item doesn't have this register field
+            if not hasattr(item, key):
                 continue
             # skip if reg is not a constant
+            value = getattr(item, key)
             if value not in constants:
                 continue
             # reg IS a constant
-            modified = True
-            reg = constants[value]
-            resolved_regs[key] = reg
+            resolved_regs[key] = constants[value]
 
-        if not modified:
+        if not resolved_regs:
             new_items.append(item)
             continue
 
-        d.update(resolved_regs)
-
         # create the new item using the resolved registers
-        new_item = item.__class__(*d.values())
+        new_item = copy.copy(item)
+        for key, reg in resolved_regs.items():
+            setattr(new_item, key, reg)
         new_items.append(new_item)
 
         log_conversion('resolve_register_aliases', item, new_item)
@@ -2571,11 +2654,6 @@ def transform_compressible(items, constants, labels):
     # signature of inner functions:
     # inner(instruction, position, env)
 
-    def NameEquals(value):
-        def inner(i, p, e):
-            return i.name == value
-        return inner
-
     def RegEquals(name, value):
         def inner(i, p, e):
             reg = getattr(i, name)
@@ -2630,207 +2708,185 @@ def transform_compressible(items, constants, labels):
             return imm >= lo and imm <= hi
         return inner
 
+    # compressed name -> (name of the instruction it replaces, predicates)
     criteria = {
         # this has to be first since it collides with c.addi
-        'c.addi16sp': [
-            NameEquals('addi'),
+        'c.addi16sp': ('addi', [
             RegEquals('rd', 2),
             RegEquals('rs1', 2),
             ImmNotEquals(0),
             ImmDivisibleBy(16),
             ImmBetween(-2**5 * 16, 2**5 * 16 - 1),
-        ],
-        'c.addi4spn': [
-            NameEquals('addi'),
+        ]),
+        'c.addi4spn': ('addi', [
             RegBetween('rd', 8, 15),
             RegEquals('rs1', 2),
             ImmNotEquals(0),
             ImmDivisibleBy(4),
             ImmBetween(0, 2**8 * 4 - 1),
-        ],
-        'c.lw': [
-            NameEquals('lw'),
+        ]),
+        'c.lw': ('lw', [
             RegBetween('rd', 8, 15),
             RegBetween('rs1', 8, 15),
             ImmDivisibleBy(4),
             ImmBetween(0, 2**5 * 4 - 1),
-        ],
-        'c.sw': [
-            NameEquals('sw'),
+        ]),
+        'c.sw': ('sw', [
             RegBetween('rs1', 8, 15),
             RegBetween('rs2', 8, 15),
             ImmDivisibleBy(4),
             ImmBetween(0, 2**5 * 4 - 1),
-        ],
-        'c.nop': [
-            NameEquals('addi'),
+        ]),
+        'c.nop': ('addi', [
             RegEquals('rd', 0),
             RegEquals('rs1', 0),
             ImmEquals(0),
-        ],
-        'c.addi': [
-            NameEquals('addi'),
+        ]),
+        'c.addi': ('addi', [
             RegNotEquals('rd', 0),
             RegNotEquals('rs1', 0),
             RegsMatch('rd', 'rs1'),
             ImmNotEquals(0),
             ImmBetween(-2**5, 2**5 - 1),
-        ],
-        'c.jal': [
-            NameEquals('jal'),
+        ]),
+        'c.jal': ('jal', [
             RegEquals('rd', 1),
             ImmDivisibleBy(2),
             ImmBetween(-2**10 * 2, 2**10 * 2 - 1),
-        ],
-        'c.li': [
-            NameEquals('addi'),
+        ]),
+        'c.li': ('addi', [
             RegNotEquals('rd', 0),
             RegEquals('rs1', 0),
             ImmBetween(-2**5, 2**5 - 1),
-        ],
-        'c.lui': [
-            NameEquals('lui'),
+        ]),
+        'c.lui': ('lui', [
             RegNotEquals('rd', 0),
             RegNotEquals('rd', 2),
             ImmNotEquals(0),
             ImmBetween(-2**5, 2**5 - 1),
-        ],
+        ]),
         # check for alternate upper bound case
-        'c.lui_alt': [
-            NameEquals('lui'),
+        'c.lui_alt': ('lui', [
             RegNotEquals('rd', 0),
             RegNotEquals('rd', 2),
             ImmNotEquals(0),
             ImmBetween(0xfffe0, 0xfffff),
-        ],
-        'c.srli': [
-            NameEquals('srli'),
+        ]),
+        'c.srli': ('srli', [
             RegBetween('rd', 8, 15),
             RegBetween('rs1', 8, 15),
             RegsMatch('rd', 'rs1'),
             RegNotEquals('rs2', 0),
             RegBetween('rs2', 0, 2**5 - 1),
-        ],
-        'c.srai': [
-            NameEquals('srai'),
+        ]),
+        'c.srai': ('srai', [
             RegBetween('rd', 8, 15),
             RegBetween('rs1', 8, 15),
             RegsMatch('rd', 'rs1'),
             RegNotEquals('rs2', 0),
             RegBetween('rs2', 0, 2**5 - 1),
-        ],
-        'c.andi': [
-            NameEquals('andi'),
+        ]),
+        'c.andi': ('andi', [
             RegBetween('rd', 8, 15),
             RegBetween('rs1', 8, 15),
             RegsMatch('rd', 'rs1'),
             ImmBetween(-2**5, 2**5 - 1),
-        ],
-        'c.sub': [
-            NameEquals('sub'),
+        ]),
+        'c.sub': ('sub', [
             RegBetween('rd', 8, 15),
             RegBetween('rs1', 8, 15),
             RegsMatch('rd', 'rs1'),
             RegBetween('rs2', 8, 15),
-        ],
-        'c.xor': [
-            NameEquals('xor'),
+        ]),
+        'c.xor': ('xor', [
             RegBetween('rd', 8, 15),
             RegBetween('rs1', 8, 15),
             RegsMatch('rd', 'rs1'),
             RegBetween('rs2', 8, 15),
-        ],
-        'c.or': [
-            NameEquals('or'),
+        ]),
+        'c.or': ('or', [
             RegBetween('rd', 8, 15),
             RegBetween('rs1', 8, 15),
             RegsMatch('rd', 'rs1'),
             RegBetween('rs2', 8, 15),
-        ],
-        'c.and': [
-            NameEquals('and'),
+        ]),
+        'c.and': ('and', [
             RegBetween('rd', 8, 15),
             RegBetween('rs1', 8, 15),
             RegsMatch('rd', 'rs1'),
             RegBetween('rs2', 8, 15),
-        ],
-        'c.j': [
-            NameEquals('jal'),
+        ]),
+        'c.j': ('jal', [
             RegEquals('rd', 0),
             ImmDivisibleBy(2),
             ImmBetween(-2**10 * 2, 2**10 * 2 - 1),
-        ],
-        'c.beqz': [
-            NameEquals('beq'),
+        ]),
+        'c.beqz': ('beq', [
             RegBetween('rs1', 8, 15),
             RegEquals('rs2', 0),
             ImmDivisibleBy(2),
             ImmBetween(-2**7 * 2, 2**7 * 2 - 1),
-        ],
-        'c.bnez': [
-            NameEquals('bne'),
+        ]),
+        'c.bnez': ('bne', [
             RegBetween('rs1', 8, 15),
             RegEquals('rs2', 0),
             ImmDivisibleBy(2),
             ImmBetween(-2**7 * 2, 2**7 * 2 - 1),
-        ],
-        'c.slli': [
-            NameEquals('slli'),
+        ]),
+        'c.slli': ('slli', [
             RegNotEquals('rd', 0),
             RegNotEquals('rs1', 0),
             RegsMatch('rd', 'rs1'),
             RegNotEquals('rs2', 0),
             RegBetween('rs2', 0, 2**5 - 1),
-        ],
-        'c.lwsp': [
-            NameEquals('lw'),
+        ]),
+        'c.lwsp': ('lw', [
             RegNotEquals('rd', 0),
             RegEquals('rs1', 2),
             ImmDivisibleBy(4),
             ImmBetween(0, 2**6 * 4 - 1),
-        ],
-        'c.jr': [
-            NameEquals('jalr'),
+        ]),
+        'c.jr': ('jalr', [
             RegEquals('rd', 0),
             RegNotEquals('rs1', 0),
             ImmEquals(0),
-        ],
-        'c.mv': [
-            NameEquals('add'),
+        ]),
+        'c.mv': ('add', [
             RegNotEquals('rd', 0),
             RegEquals('rs1', 0),
             RegNotEquals('rs2', 0),
-        ],
-        'c.mv_alt': [
-            NameEquals('addi'),
+        ]),
+        'c.mv_alt': ('addi', [
             RegNotEquals('rd', 0),
             RegNotEquals('rs1', 0),
             ImmEquals(0),
-        ],
-        'c.ebreak': [
-            NameEquals('ebreak'),
-        ],
-        'c.add': [
-            NameEquals('add'),
+        ]),
+        'c.ebreak': ('ebreak', [
+        ]),
+        'c.add': ('add', [
             RegNotEquals('rd', 0),
             RegNotEquals('rs1', 0),
             RegsMatch('rd', 'rs1'),
             RegNotEquals('rs2', 0),
-        ],
-        'c.jalr': [
-            NameEquals('jalr'),
+        ]),
+        'c.jalr': ('jalr', [
             RegEquals('rd', 1),
             RegNotEquals('rs1', 0),
             ImmEquals(0),
-        ],
-        'c.swsp': [
-            NameEquals('sw'),
+        ]),
+        'c.swsp': ('sw', [
             RegEquals('rs1', 2),
             ImmDivisibleBy(4),
             ImmBetween(0, 2**6 * 4 - 1),
-        ],
+        ]),
     }
 
+    # group criteria by the instruction they compress (keeping their order)
+    # so that each item is only checked against its own candidates
+    candidates = {}
+    for name, (source, preds) in criteria.items():
+        candidates.setdefault(source, []).append((name, preds))
+
     # used for imm evaluation
     env = ChainMap(constants, labels)
 
@@ -2845,7 +2901,7 @@ def transform_compressible(items, constants, labels):
 
         # check if any set of criteria is all true for this item
         compressed = None
-        for name, preds in criteria.items():
+        for name, preds in candidates.get(item.name, []):
             if all(pred(item, position, env) for pred in preds):
                 compressed = name
                 break
@@ -3111,13 +3167,14 @@ def resolve_aligns(items, labels):
 
 
 def resolve_immediates(items, constants, labels):
+    # used for imm evaluation
+    env = ChainMap(constants, labels)
+
     position = 0
     new_items = []
     for item in items:
-        d = copy.deepcopy(vars(item))
-
         # skip items without an immediate field
-        if 'imm' not in d:
+        if not hasattr(item, 'imm'):
             position += item.size()
             new_items.append(item)
             continue
@@ -3128,7 +3185,6 @@ def resolve_immediates(items, constants, labels):
             trivial = True
 
         # resolve the immediate field
-        env = ChainMap(constants, labels)
         imm = item.imm.eval(position, env, item.line)
 
         # account for AUIPC "PC based on previous inst" nuance
@@ -3138,10 +3194,10 @@ def resolve_immediates(items, constants, labels):
             else:
                 imm += 4
 
-        d['imm'] = imm
-
         # create the new item using the resolved immediate
-        new_item = item.__class__(*d.values())
+        # (only imm changes, so the other fields can be shared)
+        new_item = copy.copy(item)
+        new_item.imm = imm
         position += new_item.size()
         new_items.append(new_item)
 
@@ -3151,12 +3207,11 @@ def resolve_immediates(items, constants, labels):
     return new_items
 
 
+# generator: feeds straight into resolve_data and resolve_blobs
 def resolve_instructions(items):
-    new_items = []
-
     for item in items:
         if not isinstance(item, Instruction):
-            new_items.append(item)
+            yield item
             continue
 
         encode_func = INSTRUCTIONS[item.name]
@@ -3171,37 +3226,22 @@ def resolve_instructions(items):
         except ValueError as e:
             raise AssemblerError(str(e), item.line)
 
-        # pack into 2 bytes if item is a CompressedInstruction, else 4
-        if isinstance(item, CompressedInstruction):
-            fmt = '<H'
-        else:
-            fmt = '<I'
-
-        code = struct.pack(fmt, code)
+        # 2 bytes if item is a CompressedInstruction, else 4 (always little-endian)
+        code = code.to_bytes(item.size(), 'little')
         blob = Blob(item.line, code)
-        new_items.append(blob)
 
         log_conversion('resolve_instructions', item, blob)
 
-    return new_items
-
+        yield blob
 
-def resolve_strings(items):
-    new_items = []
-    for item in items:
-        if not isinstance(item, String):
-            new_items.append(item)
-            continue
 
-        blob = Blob(item.line, item.value.encode('utf-8'))
-        new_items.append(blob)
+def resolve_string(item):
+    blob = Blob(item.line, item.value.encode('utf-8'))
+    log_conversion('resolve_strings', item, blob)
+    return blob
 
-        log_conversion('resolve_strings', item, blob)
 
-    return new_items
-
-
-def resolve_sequences(items):
+def resolve_sequence(item):
     endianness = '<'
     formats = {
         'bytes': 'B',
@@ -3211,30 +3251,26 @@ def resolve_sequences(items):
         'longlongs': 'Q',
     }
 
-    new_items = []
-    for item in items:
-        if not isinstance(item, Sequence):
-            new_items.append(item)
-            continue
+    values = [int(value, base=0) for value in item.values]
 
-        values = [int(value, base=0) for value in item.values]
+    # build one format for the whole sequence (signed per negative value)
+    code = formats[item.name]
+    fmt = endianness + ''.join(code.lower() if value < 0 else code for value in values)
+    blob = Blob(item.line, struct.pack(fmt, *values))
 
-        data = bytearray()
-        for value in values:
-            fmt = endianness + formats[item.name]
-            if value < 0:
-                fmt = fmt.lower()
-            value = struct.pack(fmt, value)
-            data.extend(value)
-        blob = Blob(item.line, bytes(data))
-        new_items.append(blob)
+    log_conversion('resolve_sequences', item, blob)
+    return blob
 
-        log_conversion('resolve_sequences', item, blob)
 
-    return new_items
+def resolve_pack(item):
+    data = struct.pack(item.fmt, item.imm)
+    blob = Blob(item.line, data)
+    log_conversion('resolve_packs', item, blob)
+    return blob
 
 
-def transform_shorthand_packs(items):
+# expand shorthand pack syntax into the full syntax
+def resolve_shorthand_pack(item):
     endianness = '<'
     formats = {
         'db': 'B',
@@ -3243,59 +3279,45 @@ def transform_shorthand_packs(items):
         'dd': 'Q',
     }
 
-    new_items = []
-    for item in items:
-        if not isinstance(item, ShorthandPack):
-            new_items.append(item)
-            continue
-
-        fmt = endianness + formats[item.name]
-        if item.imm < 0:
-            fmt = fmt.lower()
+    fmt = endianness + formats[item.name]
+    if item.imm < 0:
+        fmt = fmt.lower()
 
-        pack = Pack(item.line, fmt, item.imm)
-        new_items.append(pack)
+    pack = Pack(item.line, fmt, item.imm)
+    log_conversion('transform_shorthand_packs', item, pack)
+    return resolve_pack(pack)
 
-        log_conversion('transform_shorthand_packs', item, pack)
 
-    return new_items
+def resolve_include_bytes(item):
+    with open(item.path, 'rb') as f:
+        data = f.read()
 
+    # defense against the dark race conditions
+    assert len(data) == item.fsize
 
-def resolve_packs(items):
-    new_items = []
-    for item in items:
-        if not isinstance(item, Pack):
-            new_items.append(item)
-            continue
-
-        data = struct.pack(item.fmt, item.imm)
-        blob = Blob(item.line, data)
-        new_items.append(blob)
+    blob = Blob(item.line, data)
+    log_conversion('resolve_include_bytes', item, blob)
+    return blob
 
-        log_conversion('resolve_packs', item, blob)
 
-    return new_items
+DATA_RESOLVERS = {
+    String: resolve_string,
+    Sequence: resolve_sequence,
+    ShorthandPack: resolve_shorthand_pack,
+    Pack: resolve_pack,
+    IncludeBytes: resolve_include_bytes,
+}
 
 
-def resolve_include_bytes(items):
-    new_items = []
+# generator: feeds straight into resolve_blobs
+def resolve_data(items):
     for item in items:
-        if not isinstance(item, IncludeBytes):
-            new_items.append(item)
+        resolver = DATA_RESOLVERS.get(type(item))
+        if resolver is None:
+            yield item
             continue
 
-        with open(item.path, 'rb') as f:
-            data = f.read()
-
-        # defense against the dark race conditions
-        assert len(data) == item.fsize
-
-        blob = Blob(item.line, data)
-        new_items.append(blob)
-
-        log_conversion('resolve_include_bytes', item, blob)
-
-    return new_items
+        yield resolver(item)
 
 
 def resolve_blobs(items):
@@ -3306,7 +3328,7 @@ def resolve_blobs(items):
 
         output.extend(item.data)
 
-    return output
+    return bytes(output)
 
 
 # Passes:
@@ -3321,11 +3343,7 @@ def resolve_blobs(items):
 #   - Resolve aligns  (convert aligns to blobs based on position)
 #   - Resolve immediates  (Arithmetic, Position, Offset, Hi, Lo)
 #   - Resolve instructions  (convert xTypeInstruction to Blob)
-#   - Resolve strings  (convert String to Blob)
-#   - Resolve sequences (convert Sequence to Blob)
-#   - Transform shorthand packs (expand shorthand pack syntax into the full syntax)
-#   - Resolve packs  (convert Pack to Blob)
-#   - Resolve include_bytes  (read include_bytes files into Blobs)
+#   - Resolve data  (convert String, Sequence, Pack, and include_bytes to Blob)
 #   - Resolve blobs  (merge all Blobs into a single binary)
 def assemble(path_or_source, *, constants=None, labels=None, compress=False, include_dirs=None):
     """
@@ -3340,11 +3358,12 @@ def assemble(path_or_source, *, constants=None, labels=None, compress=False, inc
     labels = labels if labels is not None else {}
 
     # read, lex, and parse the source
+    # (only the parsed items are kept, lines and tokens are streamed)
     lines = read_lines(path_or_source, include_dirs=include_dirs)
-    lines = [l for l in lines if len(l) > 0]
-    tokens = [lex_tokens(l) for l in lines]
-    tokens = [t for t in tokens if len(t) > 0]
-    items = [parse_item(t) for t in tokens]
+    lines = (l for l in lines if len(l) > 0)
+    tokens = (lex_tokens(l) for l in lines)
+    tokens = (t for t in tokens if len(t) > 0)
+    items = (parse_item(t) for t in tokens)
     items = [i for i in items if i is not None]
     for item in items:
         log.info('parsed file {}, line {}: "{}"'.format(os.path.basename(item.line.file), item.line.number, item))
@@ -3361,12 +3380,10 @@ def assemble(path_or_source, *, constants=None, labels=None, compress=False, inc
         items = transform_compressible(items, constants, labels)
     items = resolve_aligns(items, labels)
     items = resolve_immediates(items, constants, labels)
+    # the remaining passes visit each item once, so they are chained lazily
+    # (resolve_blobs consumes each blob as it is produced)
     items = resolve_instructions(items)
-    items = resolve_strings(items)
-    items = resolve_sequences(items)
-    items = transform_shorthand_packs(items)
-    items = resolve_packs(items)
-    items = resolve_include_bytes(items)
+    items = resolve_data(items)
     program = resolve_blobs(items)
 
     return program
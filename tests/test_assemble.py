@@ -22,6 +22,12 @@ def test_lex_assembly():
     assert tokens.tokens == ['addi', 't0', 'zero', '1']
 
 
+def test_lex_assembly_parens():
+    line = r'lw t0,%lo(foo)(sp)  # comment'
+    tokens = asm.lex_tokens(line)
+    assert tokens.tokens == ['lw', 't0', '%lo', '(', 'foo', ')', '(', 'sp', ')']
+
+
 def test_parse_assembly():
     line = r'addi t0 zero 1 # comment'
     tokens = asm.lex_tokens(line)
@@ -51,6 +57,7 @@ def test_assemble_string():
     ('bytes 1 2 0x03 0b100', b'\x01\x02\x03\x04'),
     ('bytes -1 0xff',        b'\xff\xff'),
     ('shorts 0x1234 0x5678', b'\x34\x12\x78\x56'),
+    ('shorts -2 0x1234',     b'\xfe\xff\x34\x12'),
     ('ints  1 2 3 4',        b'\x01\x00\x00\x00\x02\x00\x00\x00\x03\x00\x00\x00\x04\x00\x00\x00'),
     ('longs 1 2 3 4',        b'\x01\x00\x00\x00\x02\x00\x00\x00\x03\x00\x00\x00\x04\x00\x00\x00'),
 ])
@@ -135,6 +142,22 @@ def test_assemble_constants():
     assert binary == target
 
 
+@pytest.mark.parametrize(
+    'expr,      expected', [
+    ('0',       0),
+    ('-12',     -12),
+    ('0x10',    16),
+    ('FOO + 1', 43),
+])
+def test_arithmetic_eval(expr, expected):
+    assert asm.Arithmetic(expr).eval(0, {'FOO': 42}, None) == expected
+
+
+def test_arithmetic_eval_leading_zero():
+    with pytest.raises(asm.AssemblerError):
+        asm.Arithmetic('010').eval(0, {}, None)
+
+
 def test_assemble_modifiers():
     source = r"""
     ADDR = 0x20000000